@@ -31,7 +31,6 @@ from uuid import UUID, uuid4
 import cv2
 import pyqtgraph as pg
 import qdarkstyle
-from iso8601 import parse_date
 from PyQt6 import QtCore, QtGui, QtWidgets
 from sharktopoda_client.client import SharktopodaClient
 from sharktopoda_client.dto import Localization
@@ -52,7 +51,7 @@ from vars_gridview.lib.m3.operations import (
 from vars_gridview.lib.m3.query import QueryConstraint, QueryRequest, parse_tsv
 from vars_gridview.lib.settings import SettingsManager
 from vars_gridview.lib.sort_methods import RecordedTimestampSort
-from vars_gridview.lib.util import open_file_browser
+from vars_gridview.lib.util import open_file_browser, parse_timestamp
 from vars_gridview.lib.widgets import RectWidget
 from vars_gridview.ui.ConfirmationDialog import ConfirmationDialog
 from vars_gridview.ui.JSONTree import JSONTree
@@ -431,6 +430,8 @@ class MainWindow(TemplateBaseClass):
             return
         else:  # Unload
             self.last_selected_rect = None
+            if self.image_mosaic is not None:
+                self.image_mosaic.close()
             self.image_mosaic = None
             self.box_handler = None
 
@@ -881,7 +882,7 @@ class MainWindow(TemplateBaseClass):
         mp4_video_reference = mp4_video_data["video_reference"]
 
         mp4_video_url = mp4_video_reference.get("uri", None)
-        mp4_start_timestamp = parse_date(mp4_video["start_timestamp"])
+        mp4_start_timestamp = parse_timestamp(mp4_video["start_timestamp"])
 
         # Get the annotation timestamp
         annotation_datetime = self.image_mosaic.moment_timestamps[imaged_moment_uuid]
@@ -901,6 +902,7 @@ class MainWindow(TemplateBaseClass):
         # Open the video in Sharktopoda 2
         annotation_milliseconds = max(annotation_timedelta.total_seconds() * 1000, 0)
         video_reference_uuid = UUID(mp4_video_reference["uuid"])
+        video_reference_uuid_str = str(video_reference_uuid)  # Normalized (lowercase)
 
         def color_for_concept(concept: str):
             hash = sum(map(ord, concept)) << 5
@@ -947,8 +949,9 @@ class MainWindow(TemplateBaseClass):
             if mp4_video_data_other is None:
                 continue
             mp4_video_reference_other = mp4_video_data_other["video_reference"]
-            video_reference_uuid_other = UUID(mp4_video_reference_other["uuid"])
-            if video_reference_uuid_other != video_reference_uuid:
+
+            # Compare as strings, avoiding a UUID construction per rect
+            if mp4_video_reference_other["uuid"].lower() != video_reference_uuid_str:
                 continue
 
             # Get the annotation timestamp
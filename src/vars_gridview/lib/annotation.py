@@ -5,20 +5,44 @@ Distributed under MIT license. See license.txt for more information.
 """
 
 import json
-from typing import Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence, Union
 
 import numpy as np
 
 from vars_gridview.lib.m3.operations import (
     update_bounding_box_data,
+    update_bounding_box_data_bulk,
     update_bounding_box_part,
     update_observation_concept,
 )
+from vars_gridview.lib.util import dumps_json
 
 
 class VARSLocalization:
     """Representation of VARS localizations (bounding boxes)"""
 
+    __slots__ = (
+        "_x",
+        "_y",
+        "_width",
+        "_height",
+        "observation_uuid",
+        "association_uuid",
+        "imaged_moment_uuid",
+        "meta",
+        "_concept",
+        "_part",
+        "_dirty_concept",
+        "_dirty_part",
+        "_dirty_box",
+        "_dirty_verifier",
+        "_deleted",
+        "rect",
+        "_json_str",
+    )
+
     def __init__(
         self,
         x: int,
@@ -32,11 +56,19 @@ class VARSLocalization:
         self._y = y
         self._width = width
         self._height = height
-        self.image_reference_uuid = image_reference_uuid
         self.observation_uuid = None
         self.association_uuid = None
         self.imaged_moment_uuid = None
-        self.meta = meta
+
+        # Full JSON data, box keys first. Kept in sync by set_box so it never needs to be rebuilt
+        self.meta = {
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+            "image_reference_uuid": image_reference_uuid,
+            **meta,
+        }
         self._concept = None
         self._part = None
 
@@ -52,27 +84,153 @@ class VARSLocalization:
         # Dreaded back-reference
         self.rect = None
 
+        # Cached JSON serialization, reset whenever the JSON data changes
+        self._json_str = None
+
     @staticmethod
     def from_json(data: Union[str, dict]):
         if isinstance(data, str):
             data = json.loads(data)
 
-        return VARSLocalization(**data)
+        return VARSLocalization._from_dict(data)
 
-    @property
-    def json(self):
-        return {
-            "x": self._x,
-            "y": self._y,
-            "width": self._width,
-            "height": self._height,
-            "image_reference_uuid": self.image_reference_uuid,
-            **self.meta,
+    @staticmethod
+    def _from_dict(data: dict) -> "VARSLocalization":
+        """
+        Construct a localization from parsed JSON data. Equivalent to VARSLocalization(**data), but skips the keyword argument packing and unpacking of __init__. Must be kept in sync with __init__.
+
+        Args:
+            data: The parsed JSON data.
+
+        Returns:
+            The localization.
+        """
+        obj = object.__new__(VARSLocalization)
+        obj._x = data["x"]
+        obj._y = data["y"]
+        obj._width = data["width"]
+        obj._height = data["height"]
+        obj.observation_uuid = None
+        obj.association_uuid = None
+        obj.imaged_moment_uuid = None
+
+        # Placeholders keep the box keys first; the values come from data
+        obj.meta = {
+            "x": None,
+            "y": None,
+            "width": None,
+            "height": None,
+            "image_reference_uuid": None,
+            **data,
         }
+        obj._concept = None
+        obj._part = None
+        obj._dirty_concept = False
+        obj._dirty_part = False
+        obj._dirty_box = False
+        obj._dirty_verifier = False
+        obj._deleted = False
+        obj.rect = None
+        obj._json_str = None
+        return obj
+
+    @staticmethod
+    def from_json_many(
+        payloads: Iterable[Union[str, dict]],
+    ) -> List["VARSLocalization"]:
+        """
+        Parse many localizations at once. Equivalent to calling from_json on each payload.
+
+        Args:
+            payloads: JSON strings or dicts.
+
+        Returns:
+            The localizations, in payload order.
+        """
+        # Bind to locals to avoid repeated global lookups in the loop
+        loads = json.loads
+        from_dict = VARSLocalization._from_dict
+        return [
+            from_dict(loads(data) if isinstance(data, str) else data)
+            for data in payloads
+        ]
+
+    @staticmethod
+    def stack_coords(localizations: Sequence["VARSLocalization"]) -> np.ndarray:
+        """
+        Stack the boxes of many localizations into a single array, for vectorized checks.
+
+        Args:
+            localizations: The localizations.
+
+        Returns:
+            An (N, 4) int32 array of [x, y, xf, yf] rows, in localization order.
+        """
+        # Fill a flat buffer directly rather than going through a list of tuples
+        n = len(localizations)
+        coords = np.fromiter(
+            chain.from_iterable(
+                (loc._x, loc._y, loc._width, loc._height) for loc in localizations
+            ),
+            dtype=np.int32,
+            count=4 * n,
+        ).reshape(n, 4)
+        coords[:, 2:] += coords[:, :2]
+        return coords
+
+    @staticmethod
+    def valid_box_mask(coords: np.ndarray) -> np.ndarray:
+        """
+        Vectorized valid_box over stacked coordinates.
+
+        Args:
+            coords: An (N, 4) array from stack_coords.
+
+        Returns:
+            An (N,) boolean mask.
+        """
+        return (coords[:, 2] > coords[:, 0]) & (coords[:, 3] > coords[:, 1])
+
+    @staticmethod
+    def in_bounds_mask(
+        coords: np.ndarray, min_x: int, min_y: int, max_x: int, max_y: int
+    ) -> np.ndarray:
+        """
+        Vectorized in_bounds over stacked coordinates.
+
+        Args:
+            coords: An (N, 4) array from stack_coords.
+            min_x: The minimum x bound.
+            min_y: The minimum y bound.
+            max_x: The maximum x bound.
+            max_y: The maximum y bound.
+
+        Returns:
+            An (N,) boolean mask.
+        """
+        return (
+            (coords[:, 0] >= min_x)
+            & (coords[:, 1] >= min_y)
+            & (coords[:, 2] <= max_x)
+            & (coords[:, 3] <= max_y)
+        )
+
+    @property
+    def json(self) -> dict:
+        """
+        The localization JSON data. This is the live backing dict, not a copy; do not mutate it.
+        """
+        return self.meta
 
     @property
     def json_str(self):
-        return json.dumps(self.json)
+        if self._json_str is None:
+            self._json_str = dumps_json(self.json)
+        return self._json_str
+
+    @property
+    def image_reference_uuid(self):
+        return self.meta["image_reference_uuid"]
 
     @property
     def x(self):
@@ -115,12 +273,23 @@ class VARSLocalization:
 
     @property
     def box(self):
-        return self._x, self._y, self.xf, self.yf
+        x = self._x
+        y = self._y
+        return x, y, x + self._width, y + self._height
 
     @property
     def verified(self):
         return "verifier" in self.meta
 
+    @property
+    def dirty(self) -> bool:
+        return (
+            self._dirty_concept
+            or self._dirty_part
+            or self._dirty_box
+            or self._dirty_verifier
+        )
+
     @property
     def deleted(self):
         return self._deleted
@@ -130,13 +299,20 @@ class VARSLocalization:
         self._deleted = value
 
     def set_box(self, x: int, y: int, width: int, height: int):
-        if self.x != x or self.y != y or self.width != width or self.height != height:
+        if (
+            self._x != x
+            or self._y != y
+            or self._width != width
+            or self._height != height
+        ):
             self._dirty_box = True
 
-        self._x = int(x)
-        self._y = int(y)
-        self._width = int(width)
-        self._height = int(height)
+        meta = self.meta
+        meta["x"] = self._x = int(x)
+        meta["y"] = self._y = int(y)
+        meta["width"] = self._width = int(width)
+        meta["height"] = self._height = int(height)
+        self._json_str = None
 
     def set_concept(self, concept: str, part: str):
         if self._concept is not None and concept != self._concept:
@@ -152,52 +328,180 @@ class VARSLocalization:
         self.set_concept(concept, part)
         self.meta["verifier"] = verifier
         self._dirty_verifier = True
+        self._json_str = None
 
     def unverify(self):
         if self.verified:
             del self.meta["verifier"]
             self._dirty_verifier = True
+            self._json_str = None
 
     def get_roi(self, image: np.ndarray):
-        return image[self._y : self.yf, self._x : self.xf]
+        x = self._x
+        y = self._y
+        return image[y : y + self._height, x : x + self._width]
+
+    def get_roi_contiguous(self, image: np.ndarray) -> np.ndarray:
+        """
+        Get the ROI as a C-contiguous array. Only copies if the ROI view is not already contiguous (e.g. a partial-width crop).
+
+        Args:
+            image: The image to crop.
+
+        Returns:
+            The contiguous ROI.
+        """
+        return np.ascontiguousarray(self.get_roi(image))
 
     @property
     def valid_box(self):
-        return self.xf > self.x and self.yf > self.y
+        # xf > x and yf > y
+        return self._width > 0 and self._height > 0
 
     def in_bounds(self, min_x, min_y, max_x, max_y):
+        x = self._x
+        y = self._y
         return (
-            self.x >= min_x
-            and self.y >= min_y
-            and self.xf <= max_x
-            and self.yf <= max_y
+            x >= min_x
+            and y >= min_y
+            and x + self._width <= max_x
+            and y + self._height <= max_y
         )
 
+    def _mark_modified_by(self, verifier: str):
+        """
+        Record that the box was moved/resized by the given user.
+        """
+        self.meta["generator"] = "gridview"
+        self.meta["observer"] = verifier
+        self._json_str = None
+
     def push_changes(self, verifier: str):
         if self._deleted:
             return
 
-        do_modify_box = False
+        if not self._dirty_concept:
+            self._push_association_changes(verifier, False)
+            return
+
+        # The observation update is independent of the association updates, so overlap them
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            concept_future = executor.submit(
+                update_observation_concept,
+                self.observation_uuid,
+                self._concept,
+                verifier,
+            )
+
+            association_error = None
+            try:
+                self._push_association_changes(verifier, True)
+            except Exception as e:
+                association_error = e
 
-        if self._dirty_concept:
-            update_observation_concept(self.observation_uuid, self._concept, verifier)
+            concept_error = concept_future.exception()  # Waits for the update
+
+        if concept_error is None:
             self._dirty_concept = False
-            do_modify_box = True
 
+        # Surface the first error; the flags of the failed updates stay set
+        if association_error is not None:
+            raise association_error
+        if concept_error is not None:
+            raise concept_error
+
+    def _push_association_changes(self, verifier: str, modify_box: bool):
+        """
+        Push the part and bounding box data changes of the association. The updates stay sequential, they modify the same record. Each dirty flag is only cleared once its update succeeds.
+
+        Args:
+            verifier: The verifier username.
+            modify_box: Whether to push the bounding box data even if it didn't change (e.g. the concept changed).
+        """
         if self._dirty_part:
             update_bounding_box_part(self.association_uuid, self._part)
             self._dirty_part = False
-            do_modify_box = True
+            modify_box = True
 
         if self._dirty_box:
-            self.meta["generator"] = "gridview"  # Only changes when box moved/resized
-            self.meta["observer"] = verifier
-            self._dirty_box = False
-            do_modify_box = True
+            self._mark_modified_by(verifier)  # Only changes when box moved/resized
+            modify_box = True
 
         if self._dirty_verifier:
-            do_modify_box = True
+            modify_box = True
+
+        if modify_box:
+            update_bounding_box_data(self.association_uuid, self.json)
+            self._dirty_box = False
             self._dirty_verifier = False
 
+
+def bulk_update_localizations(localizations: Iterable[VARSLocalization], verifier: str):
+    """
+    Push the changes of many localizations to VARS.
+
+    Concept changes are pushed per observation. All bounding box association changes (part, box, verifier) are coalesced into a single bulk request.
+
+    Args:
+        localizations: The localizations to push.
+        verifier: The verifier username.
+    """
+    # Fast path: nothing to push
+    localizations = [loc for loc in localizations if loc.dirty and not loc.deleted]
+    if not localizations:
+        return
+
+    # Single pass: collect the concept changes and the localizations whose association needs updating
+    concepts_by_observation_uuid = {}
+    concept_changed = []
+    to_update = []
+    add_concept_changed = concept_changed.append  # Bound once, outside the loop
+    add_to_update = to_update.append
+    for localization in localizations:
+        do_modify_box = (
+            localization._dirty_part
+            or localization._dirty_box
+            or localization._dirty_verifier
+        )
+
+        if localization._dirty_concept:
+            # Last write wins for observations shared by multiple localizations
+            concepts_by_observation_uuid[localization.observation_uuid] = (
+                localization._concept
+            )
+            add_concept_changed(localization)
+            do_modify_box = True
+
+        if localization._dirty_box:
+            # Only changes when box moved/resized
+            localization._mark_modified_by(verifier)
+
         if do_modify_box:
-            update_bounding_box_data(self.association_uuid, self.json)
+            add_to_update(localization)
+
+    # Push concept changes
+    for observation_uuid, concept in concepts_by_observation_uuid.items():
+        update_observation_concept(observation_uuid, concept, verifier)
+    for localization in concept_changed:
+        localization._dirty_concept = False
+
+    if not to_update:
+        return
+
+    # Key by association UUID so a localization passed more than once is only sent once (last write wins)
+    request_data_by_association_uuid = {
+        localization.association_uuid: {
+            "uuid": localization.association_uuid,
+            "link_name": "bounding box",
+            "to_concept": localization._part,
+            "link_value": localization.json_str,
+            "mime_type": "application/json",
+        }
+        for localization in to_update
+    }
+    update_bounding_box_data_bulk(list(request_data_by_association_uuid.values()))
+
+    for localization in to_update:
+        localization._dirty_part = False
+        localization._dirty_box = False
+        localization._dirty_verifier = False
@@ -6,16 +6,82 @@ Distributed under MIT license. See license.txt for more information.
 
 """
 
+from typing import Callable, Dict, Optional, Set, Tuple
+
 import numpy as np
 import pyqtgraph as pg
 from PyQt6 import QtCore, QtGui, QtWidgets
 
+from vars_gridview.lib.annotation import bulk_update_localizations
 from vars_gridview.lib.log import LOGGER
 from vars_gridview.lib.m3.operations import get_kb_concepts, get_kb_parts
 from vars_gridview.lib.settings import SettingsManager
 
 
 class BoundingBox(pg.RectROI):
+    # Emitted once when the box first becomes dirty
+    sigDirty = QtCore.pyqtSignal(object)
+
+    DRAW_NAME_INTERVAL_MS = 16
+
+    # Pens by box color, and the label text fill brush, shared by all boxes
+    _pen_cache: Dict[Tuple[int, ...], QtGui.QPen] = {}
+    _text_fill_brush: Optional[QtGui.QBrush] = None
+
+    # Context menu shared by all boxes, acting on the box it was last opened on
+    _menu: Optional[QtWidgets.QMenu] = None
+    _active_box: Optional["BoundingBox"] = None
+
+    @classmethod
+    def _get_pen(cls, color: Tuple[int, ...]) -> QtGui.QPen:
+        """
+        Get the (cached) dashed pen for a box color.
+        """
+        pen = cls._pen_cache.get(color, None)
+        if pen is None:
+            pen = pg.mkPen(color, width=3, style=QtCore.Qt.PenStyle.DashLine)
+            cls._pen_cache[color] = pen
+        return pen
+
+    @classmethod
+    def _get_text_fill_brush(cls) -> QtGui.QBrush:
+        """
+        Get the (cached) label text fill brush.
+        """
+        if cls._text_fill_brush is None:
+            cls._text_fill_brush = pg.mkBrush(70, 70, 70)
+        return cls._text_fill_brush
+
+    @classmethod
+    def _get_menu(cls) -> QtWidgets.QMenu:
+        """
+        Get the (shared) context menu. Its actions apply to the active box.
+        """
+        if cls._menu is None:
+            menu = QtWidgets.QMenu()
+            menu.addAction(
+                "Change concept",
+                lambda: cls._run_on_active_box(BoundingBox._do_change_concept),
+            )
+            menu.addAction(
+                "Change part",
+                lambda: cls._run_on_active_box(BoundingBox._do_change_part),
+            )
+            menu.addSeparator()
+            menu.addAction(
+                "Delete", lambda: cls._run_on_active_box(BoundingBox._do_delete)
+            )
+            cls._menu = menu
+        return cls._menu
+
+    @classmethod
+    def _run_on_active_box(cls, method: Callable[["BoundingBox"], None]):
+        """
+        Run a context menu action on the active box, if it still exists.
+        """
+        if cls._active_box is not None:
+            method(cls._active_box)
+
     def __init__(
         self,
         view,
@@ -32,7 +98,7 @@ class BoundingBox(pg.RectROI):
             self,
             pos,
             size,
-            pen=pg.mkPen(color, width=3, style=QtCore.Qt.PenStyle.DashLine),
+            pen=BoundingBox._get_pen(tuple(color)),
             invertible=True,
             rotatable=False,
             removable=False,
@@ -43,13 +109,20 @@ class BoundingBox(pg.RectROI):
         self.addScaleHandle([0, 1], [1, 0])
         self.addTranslateHandle([0.5, 0.5])
         self.sigRemoveRequested.connect(self.remove)
-        self.sigRegionChanged.connect(self.draw_name)
+
+        # Coalesce label redraws while dragging to at most one per frame (~60 Hz)
+        self._draw_name_timer = QtCore.QTimer(self)
+        self._draw_name_timer.setSingleShot(True)
+        self._draw_name_timer.setInterval(BoundingBox.DRAW_NAME_INTERVAL_MS)
+        self._draw_name_timer.timeout.connect(self.draw_name)
+        self.sigRegionChanged.connect(self._schedule_draw_name)
 
         self.sigRegionChangeFinished.connect(self.check_bounds)
 
         self.label = label
         self.color = color
         self.textItem = None
+        self._last_text_state = None  # (x, y, label) last drawn
 
         self.view = view
         self.view.addItem(self)
@@ -57,8 +130,8 @@ class BoundingBox(pg.RectROI):
 
         self.verifier = verifier
 
-        self.dirty = False
-        self.sigRegionChanged.connect(self._dirty)
+        self._is_dirty = False
+        self.sigRegionChanged.connect(self._mark_dirty)
 
         self.sigRegionChangeFinished.connect(self.update_localization_box)
 
@@ -67,28 +140,17 @@ class BoundingBox(pg.RectROI):
 
         self.image_mosaic = image_mosaic
 
-        self._menu = QtWidgets.QMenu()
-        self._setup_menu()
-
         self.setAcceptedMouseButtons(QtCore.Qt.MouseButton.LeftButton)
         self.sigClicked.connect(
             lambda bbox, ev: self.rect.clicked.emit(self.rect, ev)
         )  # Pass click event to rect
 
-    def _setup_menu(self):
-        """
-        Set up the context menu for the bounding box.
-        """
-        self._menu.addAction("Change concept", self._do_change_concept)
-        self._menu.addAction("Change part", self._do_change_part)
-        self._menu.addSeparator()
-        self._menu.addAction("Delete", self._do_delete)
-
     def contextMenuEvent(self, ev):
         """
         Show the context menu.
         """
-        self._menu.popup(ev.screenPos())
+        BoundingBox._active_box = self
+        BoundingBox._get_menu().popup(ev.screenPos())
 
     def _do_delete(self):
         """
@@ -142,21 +204,39 @@ class BoundingBox(pg.RectROI):
         w, h = self.size()
         h = -h  # Fix negative height
 
-        min_x = 0
-        max_x = self.rect.image_width - w
-
-        min_y = h
-        max_y = self.rect.image_height
+        # Clamp the position into the image
+        new_x = min(self.rect.image_width - w, max(0, x))
+        new_y = min(self.rect.image_height, max(h, y))
 
-        if x < min_x or y < min_y or x > max_x or y > max_y:
-            self.setPos(min(max_x, max(min_x, x)), min(max_y, max(min_y, y)))
+        # Only move if clamped; setPos re-emits sigRegionChangeFinished, which calls back here
+        if new_x != x or new_y != y:
+            self.setPos(new_x, new_y)
 
     @property
     def is_selected(self):
         return self.rect.is_selected
 
-    def _dirty(self):
-        self.dirty = True
+    @property
+    def dirty(self) -> bool:
+        return self._is_dirty
+
+    def _mark_dirty(self):
+        """
+        Mark the box as dirty. One-shot: disconnects itself, since later region changes can't make the box any dirtier.
+        """
+        self._is_dirty = True
+        self.sigRegionChanged.disconnect(self._mark_dirty)
+        self.sigDirty.emit(self)
+
+    def clear_dirty(self):
+        """
+        Clear the dirty flag (e.g. after saving), re-arming it for the next region change.
+        """
+        if not self._is_dirty:
+            return
+
+        self._is_dirty = False
+        self.sigRegionChanged.connect(self._mark_dirty)
 
     def update_localization_box(self):
         x, y, w, h = self.get_box()
@@ -168,7 +248,17 @@ class BoundingBox(pg.RectROI):
         self.label = self.localization.text_label
         self.draw_name()
 
+    def _schedule_draw_name(self):
+        """
+        Schedule a label redraw, unless one is already pending.
+        """
+        if not self._draw_name_timer.isActive():
+            self._draw_name_timer.start()
+
     def remove(self, dummy):
+        self._draw_name_timer.stop()
+        if BoundingBox._active_box is self:
+            BoundingBox._active_box = None
         self.view.removeItem(self.textItem)
         self.view.removeItem(self)
 
@@ -198,16 +288,25 @@ class BoundingBox(pg.RectROI):
         else:
             y = self.pos().y()
 
+        text_state = (x, y, self.label)
+        if text_state == self._last_text_state:  # Nothing changed
+            return
+
         if self.textItem is None:
             self.textItem = pg.TextItem(
-                text=self.label, color=(255, 255, 255), fill=(70, 70, 70)
+                text=self.label,
+                color=(255, 255, 255),
+                fill=BoundingBox._get_text_fill_brush(),
             )
             self.textItem.setPos(x, y)
             self.view.addItem(self.textItem)
         else:
-            self.textItem.setText(self.label)
+            if self.label != self._last_text_state[2]:
+                self.textItem.setText(self.label)
             self.textItem.setPos(x, y)
 
+        self._last_text_state = text_state
+
 
 class BoxHandler:
     def __init__(
@@ -219,6 +318,7 @@ class BoxHandler:
         verifier=None,
     ):
         self.boxes = []
+        self._dirty_boxes: Set[BoundingBox] = set()
         self.dragging = False
 
         self.view_box = pg.ViewBox()
@@ -241,7 +341,10 @@ class BoxHandler:
     def add_annotation(self, obj_idx, rect):
         settings = SettingsManager.get_instance()
         q_color = QtGui.QColor.fromString(settings.selection_highlight_color.value)
-        for idx, localization in enumerate(rect.localizations):
+        # Add the selected localization last, so its box is drawn on top
+        for idx, localization in sorted(
+            enumerate(rect.localizations), key=lambda item: item[0] == obj_idx
+        ):
             if localization.deleted:
                 continue
             selected_loc = idx == obj_idx
@@ -274,14 +377,22 @@ class BoxHandler:
                 )
 
                 # Add it to the list
+                bb.sigDirty.connect(self._dirty_boxes.add)
                 self.boxes.append(bb)
 
         self.localization = rect.localizations[obj_idx]
 
     def save_all(self, verifier):
-        for box in self.boxes:
-            if box.dirty:
-                box.localization.push_changes(verifier)
+        if not self._dirty_boxes:  # Fast path: nothing was moved or resized
+            return
+
+        bulk_update_localizations(
+            [box.localization for box in self._dirty_boxes], verifier
+        )
+
+        for box in self._dirty_boxes:
+            box.clear_dirty()
+        self._dirty_boxes.clear()
 
     def map_pos_to_item(self, pos):
         pt = self.view_box.mapSceneToView(pos)
@@ -292,3 +403,4 @@ class BoxHandler:
         for box in self.boxes:
             box.remove(None)
         self.boxes = []
+        self._dirty_boxes.clear()
@@ -1,4 +1,6 @@
-import json
+import os
+import time
+from collections import OrderedDict
 from pathlib import Path
 from shutil import rmtree
 from typing import Iterable, Optional
@@ -7,19 +9,94 @@ from uuid import uuid4
 from PyQt6 import QtCore
 
 from vars_gridview.lib.settings import SettingsManager
+from vars_gridview.lib.util import dumps_json, loads_json
 
 
 class CacheController(QtCore.QObject):
     """
     Cache controller. Manages the image cache.
+
+    The manifest is persisted as a snapshot (manifest.json) plus an append-only journal of changes since the snapshot (manifest.log).
+    Each change appends one short journal record. The journal is compacted into a new snapshot at most once every MANIFEST_FLUSH_INTERVAL_MS, and on application exit, once it outgrows the snapshot.
     """
 
+    MANIFEST_FLUSH_INTERVAL_MS = 5000
+
+    # Compact when the journal is this many times larger than the snapshot
+    JOURNAL_COMPACT_RATIO = 4
+
+    # Name prefix of data directories that are being deleted
+    TRASH_PREFIX = ".trash-"
+
+    # Upper bound on the in-memory cache of recently read data, in bytes. Also capped at a quarter of the disk cache size
+    MEMORY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
 
         self._settings = SettingsManager.get_instance()
 
+        # In-memory LRU of recently read data in front of the disk cache, least recently used first
+        self._mem: OrderedDict = OrderedDict()
+        self._mem_bytes = 0
+
+        self._open_cache()
+
+        # Deferred manifest writes
+        self._manifest_dirty = False
+        self._manifest_flush_timer = QtCore.QTimer(self)
+        self._manifest_flush_timer.setSingleShot(True)
+        self._manifest_flush_timer.setInterval(
+            CacheController.MANIFEST_FLUSH_INTERVAL_MS
+        )
+        self._manifest_flush_timer.timeout.connect(self._flush_if_dirty)
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._flush_if_dirty)
+
+        self._settings.cache_dir.valueChanged.connect(self._on_cache_dir_changed)
+
+    def _open_cache(self):
+        """
+        Resolve and create the cache directories, then load the manifest and open the journal.
+        """
+        # Resolved once here instead of on every access, avoiding a mkdir per cache operation
+        self._cache_dir = Path(self._settings.cache_dir.value)
+        self._data_dir = self._cache_dir / "data"
+        self._data_dir.mkdir(parents=True, exist_ok=True)
+
+        # Finish deleting data left behind by a clear that was interrupted
+        for trash_dir in self._cache_dir.glob(f"{CacheController.TRASH_PREFIX}*"):
+            self._delete_in_background(trash_dir)
+
+        self._manifest_size = 0  # Snapshot size in bytes
+        self._journal_size = 0  # Journal size in bytes
         self._manifest = self._load_manifest()
+        self._total_bytes = self._sum_entry_sizes(self._manifest)
+        self._journal_file = open(self.journal_path, "ab", buffering=0)
+
+    @staticmethod
+    def _delete_in_background(path: Path):
+        """
+        Delete a directory tree on the global thread pool.
+
+        Args:
+            path: The directory to delete.
+        """
+        QtCore.QThreadPool.globalInstance().start(
+            lambda: rmtree(path, ignore_errors=True)
+        )
+
+    def _on_cache_dir_changed(self, _):
+        """
+        Switch to the new cache directory. Every change is already journaled in the old one.
+        """
+        self._manifest_flush_timer.stop()
+        self._manifest_dirty = False
+        self._journal_file.close()
+        self._mem_clear()
+        self._open_cache()
 
     @property
     def cache_dir(self) -> Path:
@@ -29,9 +106,7 @@ class CacheController(QtCore.QObject):
         Returns:
             The cache directory.
         """
-        cache_dir = Path(self._settings.cache_dir.value)
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        return cache_dir
+        return self._cache_dir
 
     @property
     def cache_size_mb(self) -> int:
@@ -51,9 +126,7 @@ class CacheController(QtCore.QObject):
         Returns:
             The data directory.
         """
-        data_dir = self.cache_dir / "data"
-        data_dir.mkdir(parents=True, exist_ok=True)
-        return data_dir
+        return self._data_dir
 
     @property
     def manifest_path(self) -> Path:
@@ -65,17 +138,112 @@ class CacheController(QtCore.QObject):
         """
         return self.cache_dir / "manifest.json"
 
-    def _load_manifest(self) -> dict:
+    @property
+    def journal_path(self) -> Path:
+        """
+        Get the manifest journal path.
+
+        Returns:
+            The manifest journal path.
+        """
+        return self.cache_dir / "manifest.log"
+
+    def _load_manifest(self) -> OrderedDict:
         """
-        Load the manifest.
+        Load the manifest snapshot and replay the journal on top of it.
 
         Returns:
-            The manifest.
+            The manifest, ordered from least to most recently used.
         """
+        manifest = OrderedDict()
         if self.manifest_path.exists():
-            with open(self.manifest_path, "r") as f:
-                return json.load(f)
-        return {}
+            with open(self.manifest_path, "rb") as f:
+                entries = loads_json(f.read())
+            self._manifest_size = self.manifest_path.stat().st_size
+
+            # Order by last use (stable, so ties keep their saved order)
+            manifest.update(
+                sorted(entries.items(), key=lambda item: item[1]["timestamp"])
+            )
+
+        if self.journal_path.exists():
+            valid_size = 0
+            with open(self.journal_path, "r+b") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):  # Torn final record
+                        break
+                    try:
+                        record = loads_json(line)
+                    except ValueError:
+                        break
+                    self._apply_journal_record(manifest, record)
+                    valid_size += len(line)
+
+                # Drop anything after the last complete record, so new records aren't appended to a torn line
+                f.truncate(valid_size)
+            self._journal_size = valid_size
+
+        return manifest
+
+    def _sum_entry_sizes(self, manifest: OrderedDict) -> int:
+        """
+        Sum the data sizes of the manifest entries, filling in the size of entries from older manifests that lack one.
+
+        Args:
+            manifest: The manifest.
+
+        Returns:
+            The total size in bytes.
+        """
+        unsized = [
+            entry for entry in manifest.values() if entry.get("size", None) is None
+        ]
+        if unsized:
+            # One directory scan instead of a Path.stat per entry (DirEntry caches its stat result)
+            with os.scandir(self.data_dir) as it:
+                sizes = {e.name: e.stat().st_size for e in it if e.is_file()}
+            for entry in unsized:
+                entry["size"] = sizes.get(entry["name"], 0)
+
+        return sum(entry["size"] for entry in manifest.values())
+
+    @staticmethod
+    def _apply_journal_record(manifest: OrderedDict, record: dict):
+        """
+        Apply a journal record to a manifest.
+
+        Args:
+            manifest: The manifest.
+            record: The journal record.
+        """
+        op = record["op"]
+        key = record["key"]
+        if op == "put":
+            manifest[key] = {
+                "name": record["name"],
+                "size": record.get("size", None),
+                "timestamp": record["ts"],
+            }
+            manifest.move_to_end(key)
+        elif op == "touch":
+            entry = manifest.get(key, None)
+            if entry is not None:
+                entry["timestamp"] = record["ts"]
+                manifest.move_to_end(key)
+        elif op == "del":
+            manifest.pop(key, None)
+
+    def _journal(self, record: dict):
+        """
+        Append a record to the manifest journal and schedule a compaction check.
+
+        Args:
+            record: The journal record.
+        """
+        line = dumps_json(record).encode("utf-8") + b"\n"
+        self._journal_file.write(line)
+        self._journal_size += len(line)
+        self._mark_manifest_dirty()
 
     def _save_manifest(self, manifest: dict):
         """
@@ -84,17 +252,59 @@ class CacheController(QtCore.QObject):
         Args:
             manifest: The manifest.
         """
-        with open(self.manifest_path, "w") as f:
-            json.dump(manifest, f, indent=2)
+        # Write to a temporary file and swap it in, so the manifest is never partially written
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(dumps_json(manifest))
+
+            # Make the new snapshot durable before it replaces the old one (and before the journal is truncated)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_size = self.manifest_path.stat().st_size
+
+    def _compact(self):
+        """
+        Write a fresh manifest snapshot and truncate the journal.
+        """
+        self._save_manifest(self._manifest)
+
+        # The snapshot now contains every journaled change
+        self._journal_file.close()
+        self._journal_file = open(self.journal_path, "wb", buffering=0)
+        self._journal_size = 0
+
+    def _mark_manifest_dirty(self):
+        """
+        Mark the manifest as changed, scheduling a flush if one is not already pending.
+        """
+        self._manifest_dirty = True
+        if not self._manifest_flush_timer.isActive():
+            self._manifest_flush_timer.start()
+
+    def _flush_if_dirty(self):
+        """
+        Compact the journal if the manifest changed and the journal has outgrown the snapshot.
+        """
+        self._manifest_flush_timer.stop()
+        if not self._manifest_dirty:
+            return
+
+        if (
+            self._journal_size
+            > CacheController.JOURNAL_COMPACT_RATIO * self._manifest_size
+        ):
+            self._compact()
+        self._manifest_dirty = False
 
     def _current_timestamp(self) -> int:
         """
         Get the current timestamp.
 
         Returns:
-            The current timestamp.
+            The current timestamp, in seconds since the epoch.
         """
-        return QtCore.QDateTime.currentDateTime().toSecsSinceEpoch()
+        return int(time.time())
 
     @property
     def cache_data_paths(self) -> Iterable[Path]:
@@ -114,7 +324,7 @@ class CacheController(QtCore.QObject):
         Returns:
             The cache size in bytes.
         """
-        return sum(path.stat().st_size for path in self.cache_data_paths)
+        return self._total_bytes
 
     @property
     def lru_key(self) -> Optional[str]:
@@ -124,10 +334,8 @@ class CacheController(QtCore.QObject):
         Returns:
             The least recently used key, or None if the cache is empty.
         """
-        if len(self._manifest) == 0:
-            return None
-
-        return min(self._manifest, key=lambda key: self._manifest[key]["timestamp"])
+        # The manifest is kept in LRU order
+        return next(iter(self._manifest), None)
 
     def _balance_cache(self):
         """
@@ -150,57 +358,148 @@ class CacheController(QtCore.QObject):
             key: The key.
             data: The file data.
         """
-        # Get a unique filename
-        output_path = None
-        while output_path is None or output_path.exists():
-            uuid = uuid4()
-            output_path = self.data_dir / str(uuid).lower()
-
-        # Write the file
-        try:
-            with open(output_path, "wb") as out:
-                out.write(data)
-        except FileNotFoundError as e:
-            print(f"Failed to write file to cache: {e}")
-            return
+        # Replace any existing entry, so its file is deleted and its size uncounted
+        if key in self._manifest:
+            self.remove(key)
+
+        # Write the file under a unique name. Exclusive creation rejects a name collision atomically, without probing first
+        while True:
+            name = str(uuid4()).lower()
+            try:
+                with open(self.data_dir / name, "xb") as out:
+                    out.write(data)
+            except FileExistsError:
+                continue
+            except FileNotFoundError as e:
+                print(f"Failed to write file to cache: {e}")
+                return
+            break
+
+        size = len(data)
+
+        # Drop our reference to the data before balancing, which may delete many files
+        del data
 
         # Update the cache manifest
+        timestamp = self._current_timestamp()
         self._manifest[key] = {
-            "name": str(output_path.relative_to(self.data_dir)),
-            "timestamp": self._current_timestamp(),
+            "name": name,
+            "size": size,
+            "timestamp": timestamp,
         }
+        self._manifest.move_to_end(key)
+        self._total_bytes += size
+        self._journal(
+            {"op": "put", "key": key, "name": name, "size": size, "ts": timestamp}
+        )
 
         # Balance the cache
         self._balance_cache()
 
-        self._save_manifest(self._manifest)
-
-    def get(self, key: str) -> Optional[bytes]:
+    def _touch(self, key: str) -> Optional[dict]:
         """
-        Get the data for a key.
+        Mark a key as most recently used.
 
         Args:
             key: The key.
 
         Returns:
-            The data, or None if the key is not in the cache or the file could not be read.
+            The manifest entry, or None if the key is not in the cache.
         """
         # Get the manifest entry
         entry = self._manifest.get(key, None)
         if entry is None:  # Key not in cache
             return None
 
-        # Update the manifest
-        entry["timestamp"] = self._current_timestamp()
-        self._save_manifest(self._manifest)
+        # Update the manifest, marking the key as most recently used
+        timestamp = self._current_timestamp()
+        is_mru = next(reversed(self._manifest)) == key
+        if not is_mru or entry["timestamp"] != timestamp:  # Skip no-op touches
+            entry["timestamp"] = timestamp
+            self._manifest.move_to_end(key)
+            self._journal({"op": "touch", "key": key, "ts": timestamp})
+
+        return entry
+
+    @property
+    def _mem_limit(self) -> int:
+        """
+        Get the in-memory cache size limit in bytes.
+
+        Returns:
+            The in-memory cache size limit in bytes.
+        """
+        return min(
+            CacheController.MEMORY_CACHE_MAX_BYTES, self.cache_size_mb * 1000000 // 4
+        )
+
+    def _mem_put(self, key: str, data: bytes):
+        """
+        Add data to the in-memory cache, evicting the least recently used data to stay under the limit.
+
+        Args:
+            key: The key.
+            data: The data.
+        """
+        limit = self._mem_limit
+        if len(data) > limit:  # Would evict everything else
+            return
+
+        self._mem[key] = data
+        self._mem_bytes += len(data)
+        while self._mem_bytes > limit:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+
+    def _mem_pop(self, key: str):
+        """
+        Drop a key from the in-memory cache, if present.
+
+        Args:
+            key: The key.
+        """
+        data = self._mem.pop(key, None)
+        if data is not None:
+            self._mem_bytes -= len(data)
+
+    def _mem_clear(self):
+        """
+        Empty the in-memory cache.
+        """
+        self._mem.clear()
+        self._mem_bytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Get the data for a key.
+
+        Args:
+            key: The key.
+
+        Returns:
+            The data, or None if the key is not in the cache or the file could not be read.
+        """
+        # Serve repeated reads from memory, still marking the key as used on disk
+        data = self._mem.get(key, None)
+        if data is not None:
+            self._mem.move_to_end(key)
+            self._touch(key)
+            return data
+
+        entry = self._touch(key)
+        if entry is None:
+            return None
 
         # Read the file
         try:
             with open(self.data_dir / entry["name"], "rb") as f:
-                return f.read()
+                data = f.read()
         except FileNotFoundError:
             return None
 
+        self._mem_put(key, data)
+        return data
+
     def remove(self, key: str):
         """
         Remove a key from the cache.
@@ -208,6 +507,8 @@ class CacheController(QtCore.QObject):
         Args:
             key: The key.
         """
+        self._mem_pop(key)
+
         # Get the manifest entry
         entry = self._manifest.get(key, None)
         if entry is None:  # Key not in cache
@@ -220,15 +521,22 @@ class CacheController(QtCore.QObject):
 
         # Update the manifest
         del self._manifest[key]
-        self._save_manifest(self._manifest)
+        self._total_bytes -= entry["size"]
+        self._journal({"op": "del", "key": key})
 
     def clear(self):
         """
         Clear the cache.
 
-        WARNING: This will delete all files in the cache data directory.
+        WARNING: This will delete all files in the cache data directory. The files are deleted in the background after this returns.
         """
-        rmtree(self.data_dir)
-
-        self._manifest = {}
-        self._save_manifest(self._manifest)
+        # Move the data out of the way and delete it in the background, so clearing a large cache doesn't block the UI
+        trash_dir = self.cache_dir / f"{CacheController.TRASH_PREFIX}{uuid4()}"
+        os.replace(self.data_dir, trash_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._delete_in_background(trash_dir)
+
+        self._manifest = OrderedDict()
+        self._total_bytes = 0
+        self._mem_clear()
+        self._compact()
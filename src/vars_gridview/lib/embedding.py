@@ -1,12 +1,16 @@
 from abc import ABC
 from pathlib import Path
+from typing import List, Optional
 
 import numpy as np
 import torch
 from dreamsim import dreamsim
-from PIL import Image
+from dreamsim.config import dreamsim_args
 from torch.types import Device
+from torchvision.transforms import InterpolationMode
+from torchvision.transforms.v2 import functional as TF
 
+from vars_gridview.lib.log import LOGGER
 from vars_gridview.lib.settings import SettingsManager
 
 
@@ -50,6 +54,18 @@ class Embedding(ABC):
         """
         raise NotImplementedError()
 
+    def embed_many(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        Embed many images. Subclasses can override this to batch the computation.
+
+        Args:
+            images (List[np.ndarray]): Images as RGB (h,w,3) Numpy arrays. Sizes may differ.
+
+        Returns:
+            np.ndarray: Vector embeddings (b,n), in image order.
+        """
+        return np.stack([self.embed(image) for image in images])
+
 
 class DreamSimEmbedding(Embedding):
     """
@@ -57,6 +73,7 @@ class DreamSimEmbedding(Embedding):
     """
 
     CACHE_SUBDIR_NAME = "dreamsim"
+    BATCH_SIZE = 32  # Max images per forward pass
 
     def __init__(self) -> None:
         settings = SettingsManager.get_instance()
@@ -65,19 +82,98 @@ class DreamSimEmbedding(Embedding):
 
         # Get the appropriate torch device
         self._device = get_torch_device()
+        LOGGER.info(f"Using torch device {self._device} for embeddings")
 
         # Download / load the models
-        self._model, self._preprocess = dreamsim(
+        self._model, _ = dreamsim(
             pretrained=True,
             device=self._device,
             cache_dir=str(dreamsim_cache_dir.resolve().absolute()),
         )
 
-    def embed(self, image: np.ndarray) -> np.ndarray:
-        # Preprocess the image
-        image_pil = Image.fromarray(image)
-        image_tensor = self._preprocess(image_pil).to(self._device)
+        # Preprocess on the GPU when there is one. Bicubic antialiased resize isn't reliably supported on MPS, so it preprocesses on the CPU
+        self._preprocess_device = self._device if self._device == "cuda" else "cpu"
+        self._img_size = dreamsim_args["img_size"]
+
+        # Run inference in FP16 on CUDA (tensor cores); embeddings are only compared by cosine distance
+        self._use_autocast = self._device == "cuda"
 
-        # Compute the embedding
-        embedding = self._model.embed(image_tensor).cpu().detach().numpy().flatten()
-        return embedding
+        # Reused pinned host staging buffer for CUDA uploads, and the event marking its last upload as done
+        self._pinned: Optional[torch.Tensor] = None
+        self._pinned_upload_done: Optional[torch.cuda.Event] = None
+
+    def _upload(self, image: np.ndarray) -> torch.Tensor:
+        """
+        Copy an image to the preprocessing device.
+
+        On CUDA, the image is staged through a reused pinned host buffer so the copy runs asynchronously, without allocating pinned memory per image.
+
+        Args:
+            image (np.ndarray): Image as an RGB (h,w,3) uint8 Numpy array.
+
+        Returns:
+            torch.Tensor: The (h,w,3) uint8 image tensor on the preprocessing device.
+        """
+        host = torch.from_numpy(np.ascontiguousarray(image))
+        if self._preprocess_device != "cuda":
+            return host
+
+        n = host.numel()
+        if self._pinned is None or self._pinned.numel() < n:
+            self._pinned = torch.empty(n, dtype=torch.uint8, pin_memory=True)
+        elif self._pinned_upload_done is not None:
+            # The previous upload must finish before the buffer is overwritten
+            self._pinned_upload_done.synchronize()
+
+        staged = self._pinned[:n].view(host.shape)
+        staged.copy_(host)
+        tensor = staged.to(self._preprocess_device, non_blocking=True)
+
+        self._pinned_upload_done = torch.cuda.Event()
+        self._pinned_upload_done.record()
+        return tensor
+
+    def _preprocess(self, image: np.ndarray) -> torch.Tensor:
+        """
+        Preprocess an image into a model input tensor, without a PIL round-trip.
+
+        Matches dreamsim's own preprocess: a bicubic resize to the model input size, scaled to [0, 1].
+
+        Args:
+            image (np.ndarray): Image as an RGB (h,w,3) uint8 Numpy array.
+
+        Returns:
+            torch.Tensor: Input tensor (1,3,img_size,img_size) on the model device.
+        """
+        tensor = self._upload(image).permute(2, 0, 1)  # HWC -> CHW
+        tensor = TF.resize(
+            tensor,
+            [self._img_size, self._img_size],
+            interpolation=InterpolationMode.BICUBIC,
+            antialias=True,
+        )
+        tensor = TF.to_dtype(tensor, torch.float32, scale=True)
+        return tensor.unsqueeze(0).to(self._device)
+
+    def embed(self, image: np.ndarray) -> np.ndarray:
+        return self.embed_many([image])[0]
+
+    def embed_many(self, images: List[np.ndarray]) -> np.ndarray:
+        batches = []
+        for start in range(0, len(images), DreamSimEmbedding.BATCH_SIZE):
+            # Preprocess the images into one (b,3,h,w) batch
+            batch = torch.cat(
+                [
+                    self._preprocess(image)
+                    for image in images[start : start + DreamSimEmbedding.BATCH_SIZE]
+                ]
+            )
+
+            # Compute the embeddings in a single forward pass
+            with torch.inference_mode(), torch.autocast(
+                device_type="cuda", dtype=torch.float16, enabled=self._use_autocast
+            ):
+                embeddings = self._model.embed(batch)
+            batches.append(embeddings.float().cpu().numpy())
+
+        return np.concatenate(batches).reshape(len(images), -1)
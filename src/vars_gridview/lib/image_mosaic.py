@@ -6,15 +6,19 @@ Distributed under MIT license. See license.txt for more infomation.
 
 """
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime, timedelta
-from typing import List, Optional
+from functools import lru_cache, partial
+from sys import intern
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import cv2
 import numpy as np
 import pyqtgraph as pg
 import requests
-from iso8601 import parse_date
 from PyQt6 import QtCore, QtWidgets
+from requests.adapters import HTTPAdapter
 
 from vars_gridview.lib import m3
 from vars_gridview.lib.annotation import VARSLocalization
@@ -23,17 +27,93 @@ from vars_gridview.lib.embedding import Embedding
 from vars_gridview.lib.log import LOGGER
 from vars_gridview.lib.m3 import operations
 from vars_gridview.lib.sort_methods import SortMethod
-from vars_gridview.lib.util import get_timestamp
+from vars_gridview.lib.util import get_timestamp, parse_timestamp
 from vars_gridview.lib.widgets import RectWidget
 
 # from vars_gridview.lib.constants import IMAGE_TYPE
 
 
+def _intern_str(value) -> str:
+    """
+    Convert a value to an interned string. Used for fields that repeat across many imaged moments or observations (e.g. per-video fields, observers), so they share one string object.
+    """
+    return intern(str(value))
+
+
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _decode_image(
+    img_raw: bytes, scale_x: float, scale_y: float
+) -> Optional[np.ndarray]:
+    """
+    Decode an encoded image and rescale it if needed. The image is read-only, since it's shared through the mosaic's decoded image cache.
+
+    Args:
+        img_raw: The encoded image bytes
+        scale_x: The x scale factor
+        scale_y: The y scale factor
+
+    Returns:
+        The decoded image, or None if it couldn't be decoded.
+    """
+    img_arr = np.frombuffer(img_raw, dtype=np.uint8)  # Zero-copy view of the bytes
+
+    # When scaling down by at least a power of two, let the decoder do that part (JPEG downsamples in the DCT domain)
+    for factor, flag in _REDUCED_DECODE_FLAGS:
+        if max(scale_x, scale_y) * factor <= 1.0:
+            img = cv2.imdecode(img_arr, flag)
+            if img is None:
+                return None
+
+            height, width = img.shape[:2]
+            img = cv2.resize(
+                img,
+                (round(width * factor * scale_x), round(height * factor * scale_y)),
+                interpolation=cv2.INTER_AREA,
+            )
+            img.setflags(write=False)
+            return img
+
+    img = cv2.imdecode(img_arr, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+
+    if scale_x != 1.0 or scale_y != 1.0:
+        img = cv2.resize(
+            img,
+            None,
+            fx=scale_x,
+            fy=scale_y,
+            interpolation=cv2.INTER_CUBIC,  # see OpenCV docs: https://docs.opencv.org/4.8.0/da/d54/group__imgproc__transform.html#ga47a974309e9102f5f08231edc7e7529d
+        )
+
+    img.setflags(write=False)
+    return img
+
+
 class ImageMosaic(QtCore.QObject):
     """
     Manager of the image mosaic widget
     """
 
+    FETCH_WORKERS = 16  # Max concurrent VARS requests
+    DECODED_IMAGE_CACHE_SIZE = 32  # Max full images kept decoded for reloading
+    FETCH_TIMEOUT = 30  # Seconds to wait on an image server before giving up
+    FETCH_RETRIES = 3  # Retries of failed image connections, with backoff
+    FETCH_BACKOFF = 0.5  # Seconds before the first retry, doubling after each
+    OBSERVATION_QUERY_CHUNK_SIZE = 500  # Max observation UUIDs per query
+    PREFETCH_ROWS = 4  # Rows above and below the viewport to prefetch pixmaps for
+    PREFETCH_DELAY_MS = 100  # Let scrolling settle before prefetching
+    PIXMAP_RETAIN_ROWS = 16  # Rows above and below the viewport to keep pixmaps for
+    RESIZE_DELAY_MS = 50  # Let resizing settle before re-rendering
+    QUERY_PROGRESS_STEP = 1000  # Query rows processed between progress updates
+    DOWNLOAD_POLL_INTERVAL = 0.1  # Seconds between UI updates while downloading
+
     def __init__(
         self,
         graphics_view: QtWidgets.QGraphicsView,
@@ -48,6 +128,9 @@ class ImageMosaic(QtCore.QObject):
         super().__init__()
 
         self._rect_widgets: List[RectWidget] = []
+
+        # Position of each rect widget in _rect_widgets, built on demand. Reset whenever the list changes
+        self._rect_widget_index: Optional[Dict[RectWidget, int]] = None
         self.roi_map = {}
         self._hide_labeled = True
         self._hide_unlabeled = True
@@ -56,6 +139,19 @@ class ImageMosaic(QtCore.QObject):
         self.n_columns = 0
         self._rect_clicked_slot = rect_clicked_slot
 
+        # Rect widgets in the current layout, and the debounced prefetch of the pixmaps around the viewport
+        self._rendered_rect_widgets: List[RectWidget] = []
+        self._prefetch_timer = QtCore.QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(ImageMosaic.PREFETCH_DELAY_MS)
+        self._prefetch_timer.timeout.connect(self._prefetch_pics)
+
+        # Debounced re-render on view resize
+        self._resize_timer = QtCore.QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(ImageMosaic.RESIZE_DELAY_MS)
+        self._resize_timer.timeout.connect(self._on_view_resized)
+
         # Initialize the graphics
         self._graphics_view: QtWidgets.QGraphicsView = graphics_view
         self._graphics_scene: QtWidgets.QGraphicsScene = None
@@ -64,6 +160,11 @@ class ImageMosaic(QtCore.QObject):
 
         self.cache_controller = cache_controller
 
+        # Recently decoded full images, so rect widgets can keep just their ROI and reload the image from its encoded bytes
+        self._decode_image = lru_cache(maxsize=ImageMosaic.DECODED_IMAGE_CACHE_SIZE)(
+            _decode_image
+        )
+
         self._embedding_model = embedding_model
 
         self.verifier = verifier
@@ -78,8 +179,8 @@ class ImageMosaic(QtCore.QObject):
 
         self.video_reference_uuid_to_mp4_video_reference = {}
         self.video_sequences_by_name = {}
+        self._mp4_video_ranges_by_sequence_name = {}  # Parsed MP4 video time ranges
 
-        self.localization_groups = {}
         self.moment_ancillary_data = {}
 
         self.n_images = 0
@@ -87,80 +188,134 @@ class ImageMosaic(QtCore.QObject):
 
         # Munge query items into corresponding dicts
         seen_associations = set()
+        bounding_box_link_values = []
+        bounding_box_fields = []
+
+        # Bind the dicts and methods used for every row to locals, avoiding repeated attribute lookups in the loop
+        image_reference_urls = self.image_reference_urls
+        observation_observer = self.observation_observer
+        moment_ancillary_data = self.moment_ancillary_data
+        moment_video_data = self.moment_video_data
+        add_seen_association = seen_associations.add
+        add_link_value = bounding_box_link_values.append
+        add_fields = bounding_box_fields.append
+
+        # Index the raw rows by column position instead of building a dict per row
+        cols = {header: idx for idx, header in enumerate(query_headers)}
+        imaged_moment_uuid_idx = cols["imaged_moment_uuid"]
+        image_reference_uuid_idx = cols["image_reference_uuid"]
+        observation_uuid_idx = cols["observation_uuid"]
+        association_uuid_idx = cols["association_uuid"]
+        image_url_idx = cols["image_url"]
+        observer_idx = cols["observer"]
+        concept_idx = cols["concept"]
+        link_name_idx = cols["link_name"]
+        to_concept_idx = cols["to_concept"]
+        link_value_idx = cols["link_value"]
+
+        # Resolve the optional ancillary and video data columns once, as (key, column index, converter)
+        ancillary_keys = {
+            "camera_platform": _intern_str,
+            "dive_number": _intern_str,
+            "depth_meters": float,
+            "latitude": float,
+            "longitude": float,
+            "oxygen_ml_per_l": float,
+            "pressure_dbar": float,
+            "salinity": float,
+            "temperature_celsius": float,
+            "light_transmission": float,
+        }
+        ancillary_columns = [
+            (k, cols[k], v) for k, v in ancillary_keys.items() if k in cols
+        ]
+        video_keys = {
+            "index_elapsed_time_millis": int,
+            "index_timecode": str,
+            "index_recorded_timestamp": parse_timestamp,
+            "video_start_timestamp": parse_timestamp,
+            "video_uri": _intern_str,
+            "video_container": _intern_str,
+            "video_reference_uuid": _intern_str,
+            "video_sequence_name": _intern_str,
+            "video_width": int,
+            "video_height": int,
+        }
+        video_columns = [(k, cols[k], v) for k, v in video_keys.items() if k in cols]
+
+        # Fetch the video sequences of the bounding box rows up front, concurrently, instead of one at a time as they're encountered
+        video_sequence_name_idx = cols.get("video_sequence_name", None)
+        video_start_timestamp_idx = cols.get("video_start_timestamp", None)
+        if (
+            video_sequence_name_idx is not None
+            and video_start_timestamp_idx is not None
+        ):
+            self._fetch_video_sequences(
+                {
+                    str(row[video_sequence_name_idx])
+                    for row in query_data
+                    if str(row[link_name_idx]) == "bounding box"
+                    and row[video_sequence_name_idx] != "null"
+                    and row[video_start_timestamp_idx] != "null"
+                }
+            )
+
+        progress_step = ImageMosaic.QUERY_PROGRESS_STEP
         with pg.ProgressDialog(
             "Processing query data...", maximum=len(query_data)
         ) as progress:
-            for query_item in (
-                dict(zip(query_headers, i)) for i in query_data
-            ):  # TODO Make pagination
-                progress += 1
+            for row_idx, row in enumerate(query_data):  # TODO Make pagination
+                # Update the progress in steps; each update is a Qt call that may process events
+                if row_idx % progress_step == 0:
+                    progress.setValue(row_idx)
 
                 # Extract fields
-                imaged_moment_uuid = str(query_item["imaged_moment_uuid"])
-                image_reference_uuid = str(query_item["image_reference_uuid"])
-                observation_uuid = str(query_item["observation_uuid"])
-                association_uuid = str(query_item["association_uuid"])
-
-                image_url = str(query_item["image_url"])
+                imaged_moment_uuid = str(row[imaged_moment_uuid_idx])
+                image_reference_uuid = str(row[image_reference_uuid_idx])
+                observation_uuid = str(row[observation_uuid_idx])
 
-                observer = str(query_item["observer"])
-                concept = str(query_item["concept"])
+                image_url = str(row[image_url_idx])
 
-                link_name = str(query_item["link_name"])
-                to_concept = str(query_item["to_concept"])
-                link_value = str(query_item["link_value"])
+                observer = _intern_str(row[observer_idx])
 
-                # Fill image_reference_uuid -> image_url
-                if image_reference_uuid not in self.image_reference_urls:
-                    self.image_reference_urls[image_reference_uuid] = image_url
+                # Fill image_reference_uuid -> image_url (first one wins, single lookup)
+                image_reference_urls.setdefault(image_reference_uuid, image_url)
 
                 # Fill observation_uuid -> observer
-                self.observation_observer[observation_uuid] = observer
+                observation_observer[observation_uuid] = observer
 
                 # Tag in ancillary data
                 # Note: this assumes a single imaged moment UUID will not have multiple ancillary data entries. This is a safe assumption for now but is not strictly necessary
-                if imaged_moment_uuid not in self.moment_ancillary_data:
-                    ancillary = dict()
-                    ancillary_keys = {
-                        "camera_platform": str,
-                        "dive_number": str,
-                        "depth_meters": float,
-                        "latitude": float,
-                        "longitude": float,
-                        "oxygen_ml_per_l": float,
-                        "pressure_dbar": float,
-                        "salinity": float,
-                        "temperature_celsius": float,
-                        "light_transmission": float,
+                if imaged_moment_uuid not in moment_ancillary_data:
+                    moment_ancillary_data[imaged_moment_uuid] = {
+                        k: v(row[idx])
+                        for k, idx, v in ancillary_columns
+                        if row[idx] != "null"
+                    }
+
+                # Extract video data. It's per imaged moment, so reuse the moment's if it's already tagged
+                video_data = moment_video_data.get(imaged_moment_uuid, None)
+                if video_data is None:
+                    video_data = {
+                        k: v(row[idx])
+                        for k, idx, v in video_columns
+                        if row[idx] != "null"
                     }
-                    for k, v in ancillary_keys.items():
-                        if k in query_item and query_item[k] != "null":
-                            ancillary[k] = v(query_item[k])
-
-                    self.moment_ancillary_data[imaged_moment_uuid] = ancillary
-
-                # Extract video data
-                video_data = dict()
-                video_keys = {
-                    "index_elapsed_time_millis": int,
-                    "index_timecode": str,
-                    "index_recorded_timestamp": parse_date,
-                    "video_start_timestamp": parse_date,
-                    "video_uri": str,
-                    "video_container": str,
-                    "video_reference_uuid": str,
-                    "video_sequence_name": str,
-                    "video_width": int,
-                    "video_height": int,
-                }
-                for k, v in video_keys.items():
-                    if k in query_item and query_item[k] != "null":
-                        video_data[k] = v(query_item[k])
 
-                # Tag in video data
-                if video_data.get("video_uri", None) is not None:  # valid video
-                    if imaged_moment_uuid not in self.moment_video_data:
-                        self.moment_video_data[imaged_moment_uuid] = video_data
+                    # Tag in video data
+                    if video_data.get("video_uri", None) is not None:  # valid video
+                        moment_video_data[imaged_moment_uuid] = video_data
+
+                # ------------------
+
+                # Skip if the row is something other than a bounding box association. Everything below is only needed for bounding boxes
+                if str(row[link_name_idx]) != "bounding box":
+                    continue
+
+                association_uuid = str(row[association_uuid_idx])
+                concept = str(row[concept_idx])
+                to_concept = str(row[to_concept_idx])
+                link_value = str(row[link_value_idx])
 
                 # Observation data
                 recorded_timestamp = video_data.get("index_recorded_timestamp", None)
@@ -173,16 +328,10 @@ class ImageMosaic(QtCore.QObject):
                 # Video data
                 video_start_timestamp = video_data["video_start_timestamp"]
 
-                # ------------------
-
-                # Skip if the row is something other than a bounding box association
-                if link_name != "bounding box":
-                    continue
-
                 # Skip if we've already seen this association
                 if association_uuid in seen_associations:
                     continue
-                seen_associations.add(association_uuid)
+                add_seen_association(association_uuid)
 
                 # Skip if the video start timestamp is not set
                 if video_start_timestamp is None:
@@ -198,22 +347,17 @@ class ImageMosaic(QtCore.QObject):
                     )
                     continue
 
-                # Parse the localization from the association link_value
-                localization = VARSLocalization.from_json(link_value)
-                localization.set_concept(concept, to_concept)
-                localization.imaged_moment_uuid = imaged_moment_uuid  # The imaged moment of the annotation. Does not necessarily correspond to the imaged moment of the bounding box association's image.
-                localization.observation_uuid = observation_uuid
-                localization.association_uuid = association_uuid
-
-                # Each group corresponds to an image to be downloaded.
-                # The key is the imaged moment UUID + image reference UUID.
-                # This is done to support when a bounding box association is tied to an image reference that is not under its annotation's imaged moment.
-                # Under this model (so as not to break anything) localizations for the same image reference but different imaged moments will be grouped SEPARATELY. This is not ideal but is the best we can do for now.
-                group_key = (imaged_moment_uuid, localization.image_reference_uuid)
-
-                if group_key not in self.localization_groups:
-                    self.localization_groups[group_key] = []
-                self.localization_groups[group_key].append(localization)
+                # Queue the association link_value to be parsed into a localization
+                add_link_value(link_value)
+                add_fields(
+                    (
+                        concept,
+                        to_concept,
+                        imaged_moment_uuid,
+                        observation_uuid,
+                        association_uuid,
+                    )
+                )
 
                 # Determine if the localization needs video info
                 needs_video_info = True  # localization.image_reference_uuid is None
@@ -223,7 +367,7 @@ class ImageMosaic(QtCore.QObject):
                 # If the localization needs video info, make sure we have it
                 # LOGGER.debug(f"Localization with {localization.association_uuid=} {needs_video_info=}")
                 if needs_video_info:
-                    # Get full video sequence data if not already fetched
+                    # Get full video sequence data if not already fetched (normally prefetched above)
                     if video_sequence_name not in self.video_sequences_by_name:
                         # Try to fetch
                         try:
@@ -270,75 +414,92 @@ class ImageMosaic(QtCore.QObject):
 
                         self.moment_mp4_data[imaged_moment_uuid] = mp4_video_data
 
-        # Download the images
-        with pg.ProgressDialog(
-            "Downloading images...", 0, len(set(self.localization_groups.keys()))
-        ) as dlg:
-            for group_key, localizations in self.localization_groups.items():
-                imaged_moment_uuid, image_reference_uuid = group_key
-
-                dlg += 1
-                if dlg.wasCanceled():
-                    LOGGER.info("Image loading cancelled by user")
-                    break
-
-                # Check if we've already downloaded the image for this group
-                if group_key in self.images_by_group:
-                    LOGGER.debug(
-                        "Skipping, already downloaded image for group with imaged moment {} and image reference {}".format(
-                            imaged_moment_uuid, image_reference_uuid
-                        )
-                    )
-                    continue
-                LOGGER.debug(
-                    f"Downloading image for group with imaged moment {imaged_moment_uuid} and image reference {image_reference_uuid}"
-                )
-
-                # Scale factors. Needed if the image is not the same size as the annotation's source image
-                scale_x = 1.0
-                scale_y = 1.0
-
-                img_raw = None
-                if image_reference_uuid is None:
-                    # No image reference, need to use beholder
-                    video_data = self.moment_video_data[imaged_moment_uuid]
+        # Parse the localizations from the association link_values
+        localizations = VARSLocalization.from_json_many(bounding_box_link_values)
+        group_setdefault = self.localization_groups.setdefault  # Bound once
+        for localization, fields in zip(localizations, bounding_box_fields):
+            (
+                concept,
+                to_concept,
+                imaged_moment_uuid,
+                observation_uuid,
+                association_uuid,
+            ) = fields
+            localization.set_concept(concept, to_concept)
+            localization.imaged_moment_uuid = imaged_moment_uuid  # The imaged moment of the annotation. Does not necessarily correspond to the imaged moment of the bounding box association's image.
+            localization.observation_uuid = observation_uuid
+            localization.association_uuid = association_uuid
+
+            # Each group corresponds to an image to be downloaded.
+            # The key is the imaged moment UUID + image reference UUID.
+            # This is done to support when a bounding box association is tied to an image reference that is not under its annotation's imaged moment.
+            # Under this model (so as not to break anything) localizations for the same image reference but different imaged moments will be grouped SEPARATELY. This is not ideal but is the best we can do for now.
+            group_key = (imaged_moment_uuid, localization.image_reference_uuid)
+
+            group_setdefault(group_key, []).append(localization)
+
+        # Resolve the URLs of image references that weren't in the query data, all at once
+        self._fetch_image_reference_urls(
+            {
+                image_reference_uuid
+                for _, image_reference_uuid in self.localization_groups
+                if image_reference_uuid is not None
+                and image_reference_uuid not in self.image_reference_urls
+            }
+        )
 
-                    source_width = video_data["video_width"]
-                    source_height = video_data["video_height"]
+        # Download the images concurrently. The workers only fetch and decode; the cache and the widgets are only touched from this thread
+        cancelled = Event()  # Set on cancel, so queued and retrying work stops early
+        session = requests.Session()
 
-                    # Find the video URI of the MP4 video
-                    original_video_reference_uuid = video_data["video_reference_uuid"]
-                    if original_video_reference_uuid is None:
-                        LOGGER.error(
-                            f"Imaged moment {imaged_moment_uuid} has no video reference, skipping"
+        # Pool one connection per worker, amortizing the handshakes across images
+        adapter = HTTPAdapter(
+            pool_connections=ImageMosaic.FETCH_WORKERS,
+            pool_maxsize=ImageMosaic.FETCH_WORKERS,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        executor = ThreadPoolExecutor(max_workers=ImageMosaic.FETCH_WORKERS)
+        try:
+            with pg.ProgressDialog(
+                "Downloading images...", 0, len(self.localization_groups)
+            ) as dlg:
+                futures = {}
+                group_keys_by_source = {}  # Groups sharing an image share one download
+                for group_key in self.localization_groups:
+                    imaged_moment_uuid, image_reference_uuid = group_key
+
+                    # Check if we've already downloaded the image for this group
+                    if group_key in self.images_by_group:
+                        LOGGER.debug(
+                            "Skipping, already downloaded image for group with imaged moment {} and image reference {}".format(
+                                imaged_moment_uuid, image_reference_uuid
+                            )
                         )
+                        dlg += 1
                         continue
+                    LOGGER.debug(
+                        f"Downloading image for group with imaged moment {imaged_moment_uuid} and image reference {image_reference_uuid}"
+                    )
 
-                    mp4_video_data = self.moment_mp4_data.get(imaged_moment_uuid, None)
-                    if mp4_video_data is None:
-                        LOGGER.warning(
-                            f"Imaged moment {imaged_moment_uuid} has no MP4 video reference, skipping"
-                        )
+                    source = self._get_image_source(
+                        session, imaged_moment_uuid, image_reference_uuid
+                    )
+                    if source is None:
+                        dlg += 1
                         continue
+                    cache_key, fetch, scale_x, scale_y = source
 
-                    # Get the MP4 video data
-                    mp4_video_reference_uri = mp4_video_data["video_reference"]["uri"]
-                    mp4_width = mp4_video_data["video_reference"]["width"]
-                    mp4_height = mp4_video_data["video_reference"]["height"]
-                    mp4_video_start_timestamp = parse_date(
-                        mp4_video_data["video"]["start_timestamp"]
-                    )  # datetime
-                    moment_timestamp = self.moment_timestamps[imaged_moment_uuid]
-
-                    # Compute the offset in milliseconds
-                    elapsed_time_millis = round(
-                        (moment_timestamp - mp4_video_start_timestamp).total_seconds()
-                        * 1000
-                    )
+                    # Already being loaded for another group (e.g. the same image reference under another imaged moment, or the same video frame)
+                    source_key = (cache_key, scale_x, scale_y)
+                    pending_group_keys = group_keys_by_source.get(source_key, None)
+                    if pending_group_keys is not None:
+                        pending_group_keys.append(group_key)
+                        continue
+                    group_keys_by_source[source_key] = pending_group_keys = [group_key]
 
-                    cache_key = (
-                        f"beholder | {mp4_video_reference_uri} | {elapsed_time_millis}"
-                    )
+                    img_raw = None
                     try:
                         img_raw = self.cache_controller.get(cache_key)
                     except Exception:
@@ -348,178 +509,478 @@ class ImageMosaic(QtCore.QObject):
                         LOGGER.debug(
                             f"Found image for moment {imaged_moment_uuid} in cache"
                         )
-                    else:
-                        # Get the capture from beholder
-                        LOGGER.debug(
-                            f"Getting capture from beholder for moment: {imaged_moment_uuid} ({mp4_video_reference_uri} @ {elapsed_time_millis} ms)"
-                        )
-                        try:
-                            img_raw = m3.BEHOLDER_CLIENT.capture_raw(
-                                mp4_video_reference_uri, elapsed_time_millis
-                            )
-                        except Exception:
-                            LOGGER.error(
-                                "Error getting capture from beholder for moment: {}, skipping".format(
-                                    imaged_moment_uuid
+
+                    future = executor.submit(
+                        ImageMosaic._load_image,
+                        imaged_moment_uuid,
+                        img_raw,
+                        fetch,
+                        scale_x,
+                        scale_y,
+                        self._decode_image,
+                        cancelled,
+                    )
+                    futures[future] = (pending_group_keys, cache_key)
+
+                # Handle the images as they arrive. Wait in short slices, so the dialog keeps processing events (and can be cancelled) while downloads are slow
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(
+                        pending,
+                        timeout=ImageMosaic.DOWNLOAD_POLL_INTERVAL,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    QtWidgets.QApplication.processEvents()
+                    if dlg.wasCanceled():
+                        LOGGER.info("Image loading cancelled by user")
+                        cancelled.set()
+                        break
+
+                    for future in done:
+                        group_keys, cache_key = futures[future]
+                        dlg += len(group_keys)
+
+                        fetched_raw, img, load_image = future.result()
+
+                        if fetched_raw is not None:
+                            try:
+                                self.cache_controller.insert(
+                                    cache_key, fetched_raw
+                                )  # Cache the image
+                                LOGGER.debug(f"Cached image with key {cache_key}")
+                            except Exception as e:
+                                LOGGER.error(f"Error caching image: {e}")
+
+                        # Create the widgets now, so only the images in flight are held in full
+                        if img is not None:
+                            for group_key in group_keys:
+                                self._add_group_widgets(
+                                    group_key, img, load_image, zoom
                                 )
-                            )
-                            continue
+        finally:
+            ImageMosaic._release_download_workers(executor, session, cancelled)
+
+        # Put the widgets in group order, regardless of download order
+        group_order = {
+            group_key: idx for idx, group_key in enumerate(self.localization_groups)
+        }
+        self._rect_widgets.sort(
+            key=lambda rw: group_order[
+                (
+                    rw.localization.imaged_moment_uuid,
+                    rw.localization.image_reference_uuid,
+                )
+            ]
+        )
 
-                        try:
-                            self.cache_controller.insert(
-                                cache_key, img_raw
-                            )  # Cache the image
-                            LOGGER.debug(f"Cached image with key {cache_key}")
-                        except Exception as e:
-                            LOGGER.error(f"Error caching image: {e}")
+        if self._embedding_model is not None:
+            self._update_embeddings()
 
-                    scale_x = source_width / mp4_width
-                    scale_y = source_height / mp4_height
+    def _get_image_source(
+        self,
+        session: requests.Session,
+        imaged_moment_uuid: str,
+        image_reference_uuid: Optional[str],
+    ) -> Optional[Tuple[str, Callable[[Event], Optional[bytes]], float, float]]:
+        """
+        Work out where the image for a localization group comes from.
 
-                else:
-                    # We have an image reference UUID, so we can get the image directly
-                    # Get the URL for the image reference, if we have it
-                    url = self.image_reference_urls.get(image_reference_uuid, None)
+        Args:
+            session: The session to fetch image URLs with
+            imaged_moment_uuid: The imaged moment UUID of the group
+            image_reference_uuid: The image reference UUID of the group, or None to capture a frame from beholder
 
-                    # If we don't have the image reference URL (wasn't fetched during query), try to fetch it and update the URL
-                    if url is None:
-                        LOGGER.debug(
-                            f"Fetching image reference {image_reference_uuid} from M3"
-                        )
-                        try:
-                            image_reference = operations.get_image_reference(
-                                image_reference_uuid
-                            )
-                        except Exception as e:
-                            LOGGER.error(
-                                f"Error getting image reference {image_reference_uuid}: {e}"
-                            )
-                            continue
+        Returns:
+            The cache key, a callable that fetches the image bytes given a cancellation event (None on failure or cancel), and the x and y scale factors to the annotation's source image. None if the group has to be skipped.
+        """
+        if image_reference_uuid is not None:
+            # We have an image reference UUID, so we can get the image directly
+            # Get the URL for the image reference. Missing if it couldn't be fetched
+            url = self.image_reference_urls.get(image_reference_uuid, None)
+            if url is None:
+                return None
+
+            return (
+                f"url | {url}",
+                partial(ImageMosaic._fetch_url, session, url),
+                1.0,
+                1.0,
+            )
 
-                        # Update the URL
-                        url = image_reference.get("url", None)
+        # No image reference, need to use beholder
+        video_data = self.moment_video_data[imaged_moment_uuid]
 
-                        # Skip if missing URL
-                        if url is None:
-                            LOGGER.error(
-                                f"Image reference {image_reference_uuid} has no URL, skipping"
-                            )
-                            continue
+        source_width = video_data["video_width"]
+        source_height = video_data["video_height"]
 
-                    cache_key = f"url | {url}"
-                    try:
-                        img_raw = self.cache_controller.get(cache_key)
-                    except Exception:
-                        pass
+        # Find the video URI of the MP4 video
+        original_video_reference_uuid = video_data["video_reference_uuid"]
+        if original_video_reference_uuid is None:
+            LOGGER.error(
+                f"Imaged moment {imaged_moment_uuid} has no video reference, skipping"
+            )
+            return None
 
-                    if img_raw is not None:
-                        LOGGER.debug(
-                            f"Found image for moment {imaged_moment_uuid} in cache"
-                        )
-                    else:
-                        # Fetch the image from the URL
-                        res = requests.get(url)
-
-                        # Check the status code and skip if not 200
-                        if res.status_code != 200:
-                            LOGGER.warn(
-                                "Unable to fetch image (status {}) at url: {}, skipping".format(
-                                    res.status_code, url
-                                )
-                            )
-                            continue
+        mp4_video_data = self.moment_mp4_data.get(imaged_moment_uuid, None)
+        if mp4_video_data is None:
+            LOGGER.warning(
+                f"Imaged moment {imaged_moment_uuid} has no MP4 video reference, skipping"
+            )
+            return None
 
-                        img_raw = res.content
+        # Get the MP4 video data
+        mp4_video_reference = mp4_video_data["video_reference"]
+        mp4_video_reference_uri = mp4_video_reference["uri"]
+        mp4_width = mp4_video_reference["width"]
+        mp4_height = mp4_video_reference["height"]
+        mp4_video_start_timestamp = parse_timestamp(
+            mp4_video_data["video"]["start_timestamp"]
+        )  # datetime
+        moment_timestamp = self.moment_timestamps[imaged_moment_uuid]
+
+        # Compute the offset in milliseconds
+        elapsed_time_millis = round(
+            (moment_timestamp - mp4_video_start_timestamp).total_seconds() * 1000
+        )
 
-                        try:
-                            self.cache_controller.insert(
-                                cache_key, img_raw
-                            )  # Cache the image
-                            LOGGER.debug(f"Cached image with key {cache_key}")
-                        except Exception as e:
-                            LOGGER.error(f"Error caching image: {e}")
+        cache_key = f"beholder | {mp4_video_reference_uri} | {elapsed_time_millis}"
+        fetch = partial(
+            ImageMosaic._capture_beholder,
+            imaged_moment_uuid,
+            mp4_video_reference_uri,
+            elapsed_time_millis,
+        )
+        return cache_key, fetch, source_width / mp4_width, source_height / mp4_height
 
-                img_arr = np.fromstring(img_raw, np.uint8)
-                img = cv2.imdecode(img_arr, cv2.IMREAD_COLOR)
+    @staticmethod
+    def _fetch_url(
+        session: requests.Session, url: str, cancelled: Event
+    ) -> Optional[bytes]:
+        """
+        Fetch an image from a URL, retrying failed connections with backoff.
 
-                # Rescale the image if needed
-                if scale_x != 1.0 or scale_y != 1.0:
-                    LOGGER.debug(
-                        f"Resizing image for moment {imaged_moment_uuid} by {scale_x}x{scale_y}"
-                    )
+        Args:
+            session: The session to fetch with
+            url: The image URL
+            cancelled: Set when loading is cancelled; stops further attempts
 
-                    if scale_x == 0 or scale_y == 0:
+        Returns:
+            The image bytes, or None if the image couldn't be fetched or loading was cancelled.
+        """
+        backoff = ImageMosaic.FETCH_BACKOFF
+        for attempt in range(ImageMosaic.FETCH_RETRIES + 1):
+            if cancelled.is_set():
+                return None
+
+            try:
+                # Stream the body and read it in one go. With a known length, that's a single exact-size read rather than buffering chunks and joining them
+                with session.get(
+                    url, stream=True, timeout=ImageMosaic.FETCH_TIMEOUT
+                ) as res:
+                    # Check the status code and skip if not 200
+                    if res.status_code != 200:
                         LOGGER.warn(
-                            f"Invalid scale factors for moment {imaged_moment_uuid}: {scale_x}x{scale_y}, skipping"
+                            "Unable to fetch image (status {}) at url: {}, skipping".format(
+                                res.status_code, url
+                            )
                         )
-                        continue
+                        return None
+
+                    return res.raw.read(decode_content=True)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == ImageMosaic.FETCH_RETRIES:
+                    LOGGER.error(f"Error fetching image at url: {url}, skipping: {e}")
+                    return None
+
+                # Back off before retrying, waking early if cancelled
+                LOGGER.debug(f"Retrying image at url: {url} after error: {e}")
+                cancelled.wait(backoff)
+                backoff *= 2
+            except Exception as e:
+                LOGGER.error(f"Error fetching image at url: {url}, skipping: {e}")
+                return None
+
+    @staticmethod
+    def _capture_beholder(
+        imaged_moment_uuid: str,
+        video_uri: str,
+        elapsed_time_millis: int,
+        cancelled: Event,
+    ) -> Optional[bytes]:
+        """
+        Capture a video frame from beholder.
 
-                    img = cv2.resize(
-                        img,
-                        None,
-                        fx=scale_x,
-                        fy=scale_y,
-                        interpolation=cv2.INTER_CUBIC,  # see OpenCV docs: https://docs.opencv.org/4.8.0/da/d54/group__imgproc__transform.html#ga47a974309e9102f5f08231edc7e7529d
-                    )
+        Args:
+            imaged_moment_uuid: The imaged moment UUID, for logging
+            video_uri: The MP4 video URI
+            elapsed_time_millis: The frame offset into the video, in milliseconds
+            cancelled: Set when loading is cancelled; skips the capture
 
-                self.n_images += 1
+        Returns:
+            The image bytes, or None if the capture failed or loading was cancelled.
+        """
+        if cancelled.is_set():
+            return None
 
-                ancillary_data = (
-                    self.moment_ancillary_data.get(imaged_moment_uuid, None) or {}
+        LOGGER.debug(
+            f"Getting capture from beholder for moment: {imaged_moment_uuid} ({video_uri} @ {elapsed_time_millis} ms)"
+        )
+        try:
+            return m3.BEHOLDER_CLIENT.capture_raw(video_uri, elapsed_time_millis)
+        except Exception:
+            LOGGER.error(
+                "Error getting capture from beholder for moment: {}, skipping".format(
+                    imaged_moment_uuid
                 )
-                video_data = self.moment_video_data.get(imaged_moment_uuid, None) or {}
-                min_x = 0
-                min_y = 0
-                max_x = img.shape[1]
-                max_y = img.shape[0]
-
-                # Filter out invalid boxes
-                valid_localizations = []
-                for loc in localizations:
-                    if not (
-                        loc.valid_box and loc.in_bounds(min_x, min_y, max_x, max_y)
-                    ):
-                        LOGGER.debug(
-                            f"Skipping localization {loc.association_uuid} due to invalid box or out of bounds"
-                        )
-                        continue
-                    valid_localizations.append(loc)
-                localizations = valid_localizations
+            )
+            return None
+
+    @staticmethod
+    def _load_image(
+        imaged_moment_uuid: str,
+        img_raw: Optional[bytes],
+        fetch: Callable[[Event], Optional[bytes]],
+        scale_x: float,
+        scale_y: float,
+        decode: Callable[[bytes, float, float], Optional[np.ndarray]],
+        cancelled: Event,
+    ) -> Tuple[
+        Optional[bytes], Optional[np.ndarray], Optional[Callable[[], np.ndarray]]
+    ]:
+        """
+        Fetch the image bytes if they weren't cached, then decode and rescale the image. Runs on a download worker.
 
-                # Create the widgets
-                for localization in localizations:
-                    observer = self.observation_observer.get(
-                        localization.observation_uuid, None
+        Args:
+            imaged_moment_uuid: The imaged moment UUID, for logging
+            img_raw: The cached image bytes, or None to fetch them
+            fetch: Fetches the image bytes
+            scale_x: The x scale factor to the annotation's source image
+            scale_y: The y scale factor to the annotation's source image
+            decode: Decodes and rescales the image bytes
+            cancelled: Set when loading is cancelled; skips the remaining work
+
+        Returns:
+            The fetched image bytes (None if cached or not fetched), the decoded image, and a callable that reloads the decoded image (both None if it couldn't be loaded).
+        """
+        if cancelled.is_set():
+            return None, None, None
+
+        fetched_raw = None
+        if img_raw is None:
+            img_raw = fetched_raw = fetch(cancelled)
+            if img_raw is None:
+                return None, None, None
+
+        if scale_x == 0 or scale_y == 0:
+            LOGGER.warn(
+                f"Invalid scale factors for moment {imaged_moment_uuid}: {scale_x}x{scale_y}, skipping"
+            )
+            return fetched_raw, None, None
+
+        if scale_x != 1.0 or scale_y != 1.0:
+            LOGGER.debug(
+                f"Resizing image for moment {imaged_moment_uuid} by {scale_x}x{scale_y}"
+            )
+
+        load_image = partial(decode, img_raw, scale_x, scale_y)
+        img = load_image()
+        if img is None:
+            LOGGER.error(f"Unable to decode image for moment {imaged_moment_uuid}")
+            return fetched_raw, None, None
+
+        return fetched_raw, img, load_image
+
+    @staticmethod
+    def _release_download_workers(
+        executor: ThreadPoolExecutor, session: requests.Session, cancelled: Event
+    ):
+        """
+        Shut down the download workers and close their session. If loading was cancelled, don't wait on the loads in flight: drop the queued ones and close the session in the background once the rest stop.
+
+        Args:
+            executor: The download executor
+            session: The session the workers fetch with
+            cancelled: Set if loading was cancelled
+        """
+        if not cancelled.is_set():
+            executor.shutdown(wait=True)
+            session.close()
+            return
+
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        def close_when_idle():
+            executor.shutdown(wait=True)
+            session.close()
+
+        Thread(target=close_when_idle, daemon=True).start()
+
+    def _add_group_widgets(
+        self,
+        group_key: Tuple[str, Optional[str]],
+        img: np.ndarray,
+        load_image: Callable[[], np.ndarray],
+        zoom: float,
+    ):
+        """
+        Create the rect widgets for the valid localizations of a group.
+
+        Args:
+            group_key: The (imaged moment UUID, image reference UUID) key of the group
+            img: The group's image
+            load_image: Reloads the group's image. The widgets only keep their ROI
+            zoom: The widget zoom
+        """
+        imaged_moment_uuid, _ = group_key
+        localizations = self.localization_groups[group_key]
+
+        self.n_images += 1
+
+        ancillary_data = self.moment_ancillary_data.get(imaged_moment_uuid, None) or {}
+        video_data = self.moment_video_data.get(imaged_moment_uuid, None) or {}
+        min_x = 0
+        min_y = 0
+        max_x = img.shape[1]
+        max_y = img.shape[0]
+
+        # Filter out invalid boxes
+        coords = VARSLocalization.stack_coords(localizations)
+        valid = VARSLocalization.valid_box_mask(coords)
+        in_bounds = VARSLocalization.in_bounds_mask(coords, min_x, min_y, max_x, max_y)
+        keep = valid & in_bounds
+        # Usually every box is kept, so only rebuild the list when some aren't
+        if not keep.all():
+            for idx in np.flatnonzero(~keep).tolist():
+                LOGGER.debug(
+                    f"Skipping localization {localizations[idx].association_uuid} due to invalid box or out of bounds"
+                )
+            localizations = [
+                localizations[idx] for idx in np.flatnonzero(keep).tolist()
+            ]
+
+        # Bind the lookups used for every widget to locals, rather than resolving them per widget
+        get_observer = self.observation_observer.get
+        rect_clicked_slot = self._rect_clicked_slot
+        similarity_sort_slot = self._similarity_sort_slot
+        add_rect_widget = self._rect_widgets.append
+        embedding_model = self._embedding_model
+
+        # Create the widgets. They share the group's localization list, each indexing its own
+        for idx, localization in enumerate(localizations):
+            observer = get_observer(localization.observation_uuid)
+            rw = RectWidget(
+                localizations,
+                img,
+                ancillary_data,
+                video_data,
+                observer,
+                idx,
+                embedding_model=embedding_model,
+                image_loader=load_image,
+            )
+            rw.text_label = localization.text_label
+            rw.update_zoom(zoom)
+            rw.clicked.connect(rect_clicked_slot)
+            rw.similaritySort.connect(similarity_sort_slot)
+            add_rect_widget(rw)
+
+            localization.rect = rw  # Back reference
+
+            self.n_localizations += 1
+
+    def _fetch_video_sequences(self, video_sequence_names: Set[str]):
+        """
+        Fetch video sequences from M3 concurrently and record them by name. Failures are logged and recorded as None.
+
+        Args:
+            video_sequence_names: The names of the video sequences to fetch
+        """
+        video_sequence_names = (
+            video_sequence_names - self.video_sequences_by_name.keys()
+        )
+        if not video_sequence_names:
+            return
+
+        with ThreadPoolExecutor(max_workers=ImageMosaic.FETCH_WORKERS) as executor:
+            futures = {
+                executor.submit(
+                    operations.get_video_sequence_by_name, video_sequence_name
+                ): video_sequence_name
+                for video_sequence_name in video_sequence_names
+            }
+            for future in as_completed(futures):
+                video_sequence_name = futures[future]
+                try:
+                    video_sequence_data = future.result()
+                except Exception as e:
+                    LOGGER.error(
+                        f"Failed to get video sequence data for {video_sequence_name}: {e}"
                     )
-                    other_locs = list(localizations)
-                    other_locs.remove(localization)
-                    rw = RectWidget(
-                        other_locs + [localization],
-                        img,
-                        ancillary_data,
-                        video_data,
-                        observer,
-                        len(other_locs),
-                        embedding_model=self._embedding_model,
+                    video_sequence_data = None
+
+                self.video_sequences_by_name[video_sequence_name] = video_sequence_data
+
+    def _fetch_image_reference_urls(self, image_reference_uuids: Set[str]):
+        """
+        Fetch image references from M3 concurrently and record their URLs. Failures are logged and leave the URL unset.
+
+        Args:
+            image_reference_uuids: The UUIDs of the image references to fetch
+        """
+        if not image_reference_uuids:
+            return
+
+        LOGGER.debug(f"Fetching {len(image_reference_uuids)} image references from M3")
+        with ThreadPoolExecutor(max_workers=ImageMosaic.FETCH_WORKERS) as executor:
+            futures = {
+                executor.submit(operations.get_image_reference, image_reference_uuid): (
+                    image_reference_uuid
+                )
+                for image_reference_uuid in image_reference_uuids
+            }
+            for future in as_completed(futures):
+                image_reference_uuid = futures[future]
+                try:
+                    image_reference = future.result()
+                except Exception as e:
+                    LOGGER.error(
+                        f"Error getting image reference {image_reference_uuid}: {e}"
                     )
-                    rw.text_label = localization.text_label
-                    rw.update_zoom(zoom)
-                    rw.clicked.connect(rect_clicked_slot)
-                    rw.similaritySort.connect(self._similarity_sort_slot)
-                    self._rect_widgets.append(rw)
+                    continue
 
-                    localization.rect = rw  # Back reference
+                url = image_reference.get("url", None)
+                if url is None:
+                    LOGGER.error(
+                        f"Image reference {image_reference_uuid} has no URL, skipping"
+                    )
+                    continue
 
-                    self.n_localizations += 1
+                self.image_reference_urls[image_reference_uuid] = url
 
     def _similarity_sort_slot(self, clicked_rect: RectWidget, same_class_only: bool):
-        def key(rect_widget: RectWidget) -> float:
-            if same_class_only and clicked_rect.text_label != rect_widget.text_label:
-                return float("inf")
-            return clicked_rect.embedding_distance(rect_widget)
+        rect_widgets = self._rect_widgets
+        if not rect_widgets:
+            return
+
+        # Stack the embeddings into an (N, D) matrix, one row per widget, so every cosine distance is computed in one vectorized pass
+        embeddings = np.stack([rect_widget.embedding for rect_widget in rect_widgets])
+        query = clicked_rect.embedding
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+        distances = 1.0 - (embeddings @ query) / norms
+
+        if same_class_only:
+            text_label = clicked_rect.text_label
+            other_class = np.fromiter(
+                (rect_widget.text_label != text_label for rect_widget in rect_widgets),
+                dtype=bool,
+                count=len(rect_widgets),
+            )
+            distances[other_class] = np.inf
 
-        # Sort the rects by distance
-        self._rect_widgets.sort(key=key)
+        # Sort the rects by distance (stable, like list.sort)
+        order = np.argsort(distances, kind="stable")
+        rect_widgets[:] = [rect_widgets[i] for i in order.tolist()]
+        self._rect_widget_index = None
 
         # Re-render the mosaic
         self.render_mosaic()
@@ -528,33 +989,43 @@ class ImageMosaic(QtCore.QObject):
         self._embedding_model = embedding_model
         for rect_widget in self._rect_widgets:
             rect_widget.update_embedding_model(embedding_model)
-            rect_widget.update_embedding()
+        self._update_embeddings()
 
-    def find_mp4_video_data(
-        self, video_sequence_name: str, timestamp: datetime
-    ) -> Optional[dict]:
+    def _update_embeddings(self):
         """
-        Find a video with an MP4 video reference for the given video sequence name and timestamp.
+        Compute the embeddings of all rect widgets in batches.
+        """
+        if not self._rect_widgets:
+            return
+
+        embeddings = self._embedding_model.embed_many(
+            [rect_widget.embedding_image for rect_widget in self._rect_widgets]
+        )
+        for rect_widget, embedding in zip(self._rect_widgets, embeddings):
+            rect_widget.embedding = embedding
+
+    def _get_mp4_video_ranges(self, video_sequence_name: str) -> Optional[list]:
+        """
+        Get the time range and first MP4 video reference of each video in a video sequence that has one. Computed once per sequence, since many imaged moments share one.
 
         Args:
             video_sequence_name: The video sequence name
-            timestamp: The timestamp
 
         Returns:
-            The matching video data dict, or None if no match found
+            List of (start, end, video, video_reference) tuples in sequence order, skipping videos without a start timestamp, duration, or MP4 video reference. None if the video sequence is unknown.
         """
-        if (
-            video_sequence_name not in self.video_sequences_by_name
-        ):  # Video sequence not encountered
-            return None
-
-        video_sequence = self.video_sequences_by_name[video_sequence_name]
+        video_ranges = self._mp4_video_ranges_by_sequence_name.get(
+            video_sequence_name, None
+        )
+        if video_ranges is not None:
+            return video_ranges
 
-        if video_sequence is None:  # No info about this video sequence
+        video_sequence = self.video_sequences_by_name.get(video_sequence_name, None)
+        if video_sequence is None:  # Not encountered, or no info about it
             return None
 
-        videos = video_sequence.get("videos", [])
-        for video in videos:
+        video_ranges = []
+        for video in video_sequence.get("videos", []):
             video_duration_millis = video.get("duration_millis", None)
             if video_duration_millis is None:  # No duration
                 continue
@@ -563,26 +1034,54 @@ class ImageMosaic(QtCore.QObject):
             if video_start_timestamp is None:  # No start timestamp
                 continue
 
+            # Find the first MP4 video reference. Other containers are unsupported
+            mp4_video_reference = next(
+                (
+                    video_reference
+                    for video_reference in video.get("video_references", [])
+                    if video_reference.get("container", None) == "video/mp4"
+                ),
+                None,
+            )
+            if mp4_video_reference is None:
+                continue
+
             # Compute datetime start-end range
-            video_start_timestamp = parse_date(video_start_timestamp)
+            video_start_timestamp = parse_timestamp(video_start_timestamp)
             video_end_timestamp = video_start_timestamp + timedelta(
                 milliseconds=video_duration_millis
             )
+            video_ranges.append(
+                (video_start_timestamp, video_end_timestamp, video, mp4_video_reference)
+            )
 
-            if not (
-                video_start_timestamp <= timestamp <= video_end_timestamp
-            ):  # Timestamp not in range
-                continue
+        self._mp4_video_ranges_by_sequence_name[video_sequence_name] = video_ranges
+        return video_ranges
 
-            video_references = video.get("video_references", [])
-            for video_reference in video_references:
-                container = video_reference.get("container", None)
-                if container is None:  # No container
-                    continue
+    def find_mp4_video_data(
+        self, video_sequence_name: str, timestamp: datetime
+    ) -> Optional[dict]:
+        """
+        Find a video with an MP4 video reference for the given video sequence name and timestamp.
 
-                if container != "video/mp4":  # Unsupported container
-                    continue
+        Args:
+            video_sequence_name: The video sequence name
+            timestamp: The timestamp
 
+        Returns:
+            The matching video data dict, or None if no match found
+        """
+        video_ranges = self._get_mp4_video_ranges(video_sequence_name)
+        if video_ranges is None:  # No info about this video sequence
+            return None
+
+        for (
+            video_start_timestamp,
+            video_end_timestamp,
+            video,
+            video_reference,
+        ) in video_ranges:
+            if video_start_timestamp <= timestamp <= video_end_timestamp:
                 return {
                     "video": video,
                     "video_reference": video_reference,
@@ -596,6 +1095,27 @@ class ImageMosaic(QtCore.QObject):
             sort_method: The sort method to use
         """
         sort_method.sort(self._rect_widgets)
+        self._rect_widget_index = None
+
+    @property
+    def rect_widget_index(self) -> Dict[RectWidget, int]:
+        """
+        Get the position of each rect widget in the mosaic order, for O(1) lookups and membership tests.
+
+        Returns:
+            Dict mapping each rect widget to its index
+        """
+        if self._rect_widget_index is None:
+            self._rect_widget_index = {
+                rw: idx for idx, rw in enumerate(self._rect_widgets)
+            }
+        return self._rect_widget_index
+
+    def close(self):
+        """
+        Release the mosaic's decoded image cache. Call when the mosaic is being replaced or discarded.
+        """
+        self._decode_image.cache_clear()
 
     def _init_graphics(self):
         """
@@ -623,6 +1143,9 @@ class ImageMosaic(QtCore.QObject):
         layout.setVerticalSpacing(0)
 
         self._graphics_view.installEventFilter(self)
+        self._graphics_view.verticalScrollBar().valueChanged.connect(
+            self._schedule_prefetch
+        )
 
         # Assign the layout to the widget
         self._graphics_widget.setLayout(layout)
@@ -631,8 +1154,10 @@ class ImageMosaic(QtCore.QObject):
         """
         Remove all widgets from the layout
         """
-        while self._graphics_widget.layout().count() > 0:
-            self._graphics_widget.layout().removeAt(0)
+        # Remove from the end, so the remaining items don't shift on each removal
+        layout = self._graphics_widget.layout()
+        for idx in range(layout.count() - 1, -1, -1):
+            layout.removeAt(idx)
 
     def render_mosaic(self):
         """
@@ -641,41 +1166,36 @@ class ImageMosaic(QtCore.QObject):
         if self._graphics_scene is None:
             raise ValueError("Graphics not initialized; call _init_graphics() first")
 
-        # Get the viewport width (without margins) and compute the number of columns
-        left, top, right, bottom = self._graphics_widget.layout().getContentsMargins()
-        width = self._graphics_view.viewport().width() - left - right
+        # Resolve the layout once, rather than once per widget added
+        layout = self._graphics_widget.layout()
+
+        columns = self._get_columns()
         if self._rect_widgets:
-            rect_widget_width = self._rect_widgets[0].boundingRect().width()
-            rect_widget_height = self._rect_widgets[0].boundingRect().height()
-            columns = max(int(width / rect_widget_width), 1)
+            bounding_rect = self._rect_widgets[0].boundingRect()
+            rect_widget_width = bounding_rect.width()
+            rect_widget_height = bounding_rect.height()
         else:
             rect_widget_width = 0
             rect_widget_height = 0
-            columns = 1  # No widgets, so just one column
 
         # Clear the graphics
         self._clear_graphics_layout()
 
-        # Get the subset of rect widgets to render
-        rect_widgets_to_render = [
-            rw
-            for rw in self._rect_widgets
-            if (not rw.is_verified and not self._hide_unlabeled)
-            or (rw.is_verified and not self._hide_labeled)
-        ]
-
-        # Hide all rect widgets that we aren't rendering
-        rect_widgets_to_hide = [
-            rw for rw in self._rect_widgets if rw not in rect_widgets_to_render
-        ]
-        for rw in rect_widgets_to_hide:
-            rw.hide()
+        # Get the subset of rect widgets to render, hiding the rest in the same pass
+        rect_widgets_to_render = []
+        for rw in self._rect_widgets:
+            if (not rw.is_verified and not self._hide_unlabeled) or (
+                rw.is_verified and not self._hide_labeled
+            ):
+                rect_widgets_to_render.append(rw)
+            else:
+                rw.hide()
 
         # Add the rect widgets to the layout
         for idx, rect_widget in enumerate(rect_widgets_to_render):
             row = int(idx / columns)
             col = idx % columns
-            self._graphics_widget.layout().addItem(rect_widget, row, col)
+            layout.addItem(rect_widget, row, col)
             rect_widget.show()  # Make sure it's visible
 
         # Resize the widget to fit the rect widget grid
@@ -686,6 +1206,69 @@ class ImageMosaic(QtCore.QObject):
 
         self.n_columns = columns
 
+        self._rendered_rect_widgets = rect_widgets_to_render
+        self._schedule_prefetch()
+
+    def _get_columns(self) -> int:
+        """
+        Get the number of rect widget columns that fit in the viewport.
+        """
+        if not self._rect_widgets:
+            return 1  # No widgets, so just one column
+
+        # Get the viewport width (without margins)
+        left, _, right, _ = self._graphics_widget.layout().getContentsMargins()
+        width = self._graphics_view.viewport().width() - left - right
+        return max(int(width / self._rect_widgets[0].boundingRect().width()), 1)
+
+    def _on_view_resized(self):
+        """
+        Re-render after the view is resized, only if the number of columns changed. Otherwise the layout is still valid.
+        """
+        if self._get_columns() != self.n_columns:
+            self.render_mosaic()
+        else:
+            self._schedule_prefetch()  # More rows may be in view
+
+    def _schedule_prefetch(self, *_):
+        """
+        Prefetch the pixmaps around the viewport once it settles. Restarting the timer drops any pending prefetch for a stale position.
+        """
+        self._prefetch_timer.start()
+
+    def _prefetch_pics(self):
+        """
+        Build the pixmaps of the rect widgets within PREFETCH_ROWS rows of the viewport, so they're ready when scrolled into view. Pixmaps more than PIXMAP_RETAIN_ROWS rows away are released, so memory stays bounded by the rows around the viewport rather than every row scrolled past.
+        """
+        rect_widgets = self._rendered_rect_widgets
+        columns = self.n_columns
+        if not rect_widgets or columns == 0:
+            return
+
+        row_height = rect_widgets[0].boundingRect().height()
+        if row_height <= 0:
+            return
+
+        # Get the range of rows to prefetch from the visible scene rect
+        visible_rect = self._graphics_view.mapToScene(
+            self._graphics_view.viewport().rect()
+        ).boundingRect()
+        top_row = int(visible_rect.top() / row_height)
+        bottom_row = int(visible_rect.bottom() / row_height)
+        first_row = max(top_row - ImageMosaic.PREFETCH_ROWS, 0)
+        last_row = bottom_row + ImageMosaic.PREFETCH_ROWS
+
+        for rect_widget in rect_widgets[first_row * columns : (last_row + 1) * columns]:
+            rect_widget.build_pic()
+
+        # Release the pixmaps far from the viewport
+        retain_first = max(top_row - ImageMosaic.PIXMAP_RETAIN_ROWS, 0) * columns
+        retain_last = (bottom_row + ImageMosaic.PIXMAP_RETAIN_ROWS + 1) * columns
+        for rect_widget in rect_widgets[:retain_first]:
+            rect_widget.release_pic()
+        for rect_widget in rect_widgets[retain_last:]:
+            rect_widget.release_pic()
+
     def label_selected(self, concept: Optional[str], part: Optional[str]):
         """
         Apply a label to the selected rect widgets.
@@ -777,55 +1360,49 @@ class ImageMosaic(QtCore.QObject):
         """
         selected = self.get_selected()
 
-        bounding_box_association_uuids_to_delete = [
+        bounding_box_association_uuids_to_delete = {
             rw.localization.association_uuid for rw in selected
-        ]
+        }
 
-        observation_uuids = [rw.localization.observation_uuid for rw in selected]
+        observation_uuids = {rw.localization.observation_uuid for rw in selected}
 
-        # Get the UUIDs of the bounding box associations tied to the observations
-        bounding_box_association_uuids_by_observation_uuid = dict()
+        # Get the UUIDs of the bounding box associations tied to the observations. Observations whose associations couldn't be fetched get no entry
+        bounding_box_association_uuids_by_observation_uuid = {}
+
+        # Query the bounding box associations of the observations in chunks, rather than fetching each observation
+        observation_uuids_list = list(observation_uuids)
+        chunk_size = ImageMosaic.OBSERVATION_QUERY_CHUNK_SIZE
         with pg.ProgressDialog(
             "Checking parent observations...",
             0,
-            len(observation_uuids),
+            len(observation_uuids_list),
             parent=self._graphics_view,
         ) as obs_pd:
-            for observation_uuid in set(observation_uuids):
-                if observation_uuid not in bounding_box_association_uuids_to_delete:
-                    bounding_box_association_uuids_by_observation_uuid[
-                        observation_uuid
-                    ] = []
-
+            for start in range(0, len(observation_uuids_list), chunk_size):
+                chunk = observation_uuids_list[start : start + chunk_size]
                 try:
-                    observation = operations.get_observation(
-                        observation_uuid
-                    )  # Get the observation data from VARS
-                    for association in observation.get("associations"):
-                        if association.get("link_name") == "bounding box":
-                            association_uuid = association.get("uuid")
-
-                            # Add the association UUID to the list for this observation UUID
-                            bounding_box_association_uuids_by_observation_uuid[
-                                observation_uuid
-                            ].append(association_uuid)
+                    association_uuids = operations.get_bounding_box_association_uuids(
+                        chunk
+                    )
                 except Exception as e:
-                    LOGGER.error(f"Error getting observation {observation_uuid}: {e}")
+                    LOGGER.error(
+                        f"Error getting bounding box associations of {len(chunk)} observations, they won't be checked for deletion: {e}"
+                    )
+                else:
+                    # Observations missing from the result have no bounding box associations
+                    for observation_uuid in chunk:
+                        bounding_box_association_uuids_by_observation_uuid[
+                            observation_uuid
+                        ] = association_uuids.get(observation_uuid, set())
 
-                obs_pd += 1
+                obs_pd += len(chunk)
 
-        # Select the subset of observations that will have no more bounding box associations after deleting the selected ones
-        dangling_observations_uuids_to_delete = [
+        # Select the subset of observations that will have no more bounding box associations after deleting the selected ones. Unknown observations are never selected
+        dangling_observations_uuids_to_delete = {
             observation_uuid
-            for observation_uuid in observation_uuids
-            if len(
-                set(
-                    bounding_box_association_uuids_by_observation_uuid[observation_uuid]
-                )
-                - set(bounding_box_association_uuids_to_delete)
-            )
-            == 0
-        ]
+            for observation_uuid, association_uuids in bounding_box_association_uuids_by_observation_uuid.items()
+            if association_uuids.issubset(bounding_box_association_uuids_to_delete)
+        }
 
         if len(dangling_observations_uuids_to_delete) > 0:
             # Show a dialog to the user asking if they want to delete observations too
@@ -846,6 +1423,7 @@ class ImageMosaic(QtCore.QObject):
         self.clear_selected()
 
         # Delete the observations/associations for the selected widgets and hide them
+        deleted = set()
         with pg.ProgressDialog(
             f"Deleting localizations{' and dangling observations' if delete_observations else ''}...",
             0,
@@ -860,9 +1438,13 @@ class ImageMosaic(QtCore.QObject):
                 )  # Only delete the observation if it's in the list of dangling observations
                 rw.delete(observation=delete_observation)
                 rw.hide()
-                self._rect_widgets.remove(rw)
+                deleted.add(rw)
                 pd += 1
 
+        # Drop the deleted widgets in one pass
+        self._rect_widgets[:] = [rw for rw in self._rect_widgets if rw not in deleted]
+        self._rect_widget_index = None
+
         # Re-render to ensure the deleted widgets are removed from the view
         self.render_mosaic()
 
@@ -870,7 +1452,7 @@ class ImageMosaic(QtCore.QObject):
         """
         Deselect a rect widget.
         """
-        if rect_widget not in self._rect_widgets:
+        if rect_widget not in self.rect_widget_index:
             raise ValueError("Widget not in rect widget list")
 
         # Deselect the widget
@@ -881,7 +1463,7 @@ class ImageMosaic(QtCore.QObject):
         """
         Select a rect widget.
         """
-        if rect_widget not in self._rect_widgets:
+        if rect_widget not in self.rect_widget_index:
             raise ValueError("Widget not in rect widget list")
 
         # Clear the selection if requested
@@ -896,33 +1478,36 @@ class ImageMosaic(QtCore.QObject):
         """
         Select a range of rect widgets.
         """
-        if first not in self._rect_widgets:
+        rect_widget_index = self.rect_widget_index
+        if first not in rect_widget_index:
             raise ValueError("First widget not in rect widget list")
-        elif last not in self._rect_widgets:
+        elif last not in rect_widget_index:
             raise ValueError("Last widget not in rect widget list")
 
         # Get the indices of the first and last widgets
-        first_idx = self._rect_widgets.index(first)
-        last_idx = self._rect_widgets.index(last)
+        first_idx = rect_widget_index[first]
+        last_idx = rect_widget_index[last]
 
         begin_idx = min(first_idx, last_idx)
         end_idx = max(first_idx, last_idx)
 
-        # Select all widgets in the range
-        self.clear_selected()
-        for idx in range(begin_idx, end_idx + 1):
+        # Select all widgets in the range and clear the rest, only repainting widgets whose selection changes
+        for idx, rw in enumerate(self._rect_widgets):
             # Only select if it's visible
-            if self._rect_widgets[idx].isVisible():
-                self._rect_widgets[idx].is_selected = True
-                self._rect_widgets[idx].update()
+            selected = begin_idx <= idx <= end_idx and rw.isVisible()
+            if rw.is_selected != selected:
+                rw.is_selected = selected
+                rw.update()
 
     def clear_selected(self):
         """
         Clear the selection of rect widgets.
         """
-        for ind in range(0, len(self._rect_widgets)):
-            self._rect_widgets[ind].is_selected = False
-            self._rect_widgets[ind].update()
+        for rw in self._rect_widgets:
+            # Only repaint the widgets that were selected
+            if rw.is_selected:
+                rw.is_selected = False
+                rw.update()
 
     def update_zoom(self, zoom):
         for rect in self._rect_widgets:
@@ -944,7 +1529,7 @@ class ImageMosaic(QtCore.QObject):
         first = selected[0]
 
         # Get the index of the first selected widget
-        first_idx = self._rect_widgets.index(first)
+        first_idx = self.rect_widget_index[first]
 
         # Get the index of the next widget
         if key == QtCore.Qt.Key.Key_Left:
@@ -966,7 +1551,7 @@ class ImageMosaic(QtCore.QObject):
 
     def eventFilter(self, source, event):
         if source is self._graphics_view and event.type() == QtCore.QEvent.Type.Resize:
-            self.render_mosaic()  # Re-render when the view is resized
+            self._resize_timer.start()  # Re-render once the view is done resizing
         if (
             source is self._graphics_view
             and event.type() == QtCore.QEvent.Type.KeyPress
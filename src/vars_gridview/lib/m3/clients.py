@@ -121,6 +121,10 @@ class AnnosaurusClient(M3Client):
     ) -> requests.Response:
         return self.put(f"/associations/{association_uuid}", data=data)
 
+    @needs_auth
+    def update_associations_bulk(self, data: list) -> requests.Response:
+        return self.put("/associations/bulk", json=data)
+
     @needs_auth
     def delete_association(self, association_uuid: str) -> requests.Response:
         return self.delete(f"/associations/{association_uuid}")
@@ -2,14 +2,14 @@
 M3 operations. Make use of the clients defined in __init__.py.
 """
 
-import json
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set
 
 import requests
 
 from vars_gridview.lib import m3
 from vars_gridview.lib.log import LOGGER
-from vars_gridview.lib.m3.query import QueryRequest
+from vars_gridview.lib.m3.query import QueryConstraint, QueryRequest, parse_tsv
+from vars_gridview.lib.util import dumps_json
 
 KB_CONCEPTS: Dict[str, Optional[str]] = None
 KB_PARTS: List[str] = None
@@ -130,7 +130,7 @@ def update_bounding_box_data(association_uuid: str, box_dict: dict) -> dict:
     Update a bounding box's JSON data (link_value field of association).
     """
     request_data = {
-        "link_value": json.dumps(box_dict),
+        "link_value": dumps_json(box_dict),
     }
 
     LOGGER.debug(f"Updating bounding box data for {association_uuid}:\n{request_data}")
@@ -144,6 +144,24 @@ def update_bounding_box_data(association_uuid: str, box_dict: dict) -> dict:
     return response.json()
 
 
+def update_bounding_box_data_bulk(request_data: List[dict]) -> List[dict]:
+    """
+    Update many bounding box associations in a single request.
+
+    Args:
+        request_data: Association dicts, each with the association's "uuid" and the fields to write.
+    """
+    LOGGER.debug(f"Updating {len(request_data)} bounding boxes in bulk")
+    response = m3.ANNOSAURUS_CLIENT.update_associations_bulk(request_data)
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        LOGGER.debug(f"Error updating {len(request_data)} bounding boxes in bulk: {e}")
+        raise e
+
+    return response.json()
+
+
 def update_bounding_box_part(association_uuid: str, part: str) -> dict:
     """
     Update a bounding box's part (to_concept field of association).
@@ -221,6 +239,43 @@ def get_observation(observation_uuid: str) -> requests.Response:
     return response.json()
 
 
+def get_bounding_box_association_uuids(
+    observation_uuids: Iterable[str],
+) -> Dict[str, Set[str]]:
+    """
+    Get the UUIDs of the bounding box associations of many observations, in a single query.
+
+    Args:
+        observation_uuids: UUIDs of the observations.
+
+    Returns:
+        The bounding box association UUIDs by observation UUID. Observations without bounding box associations are omitted.
+    """
+    observation_uuids = list(observation_uuids)
+    LOGGER.debug(
+        f"Getting bounding box associations of {len(observation_uuids)} observations"
+    )
+    query_request = QueryRequest(
+        select=["observation_uuid", "association_uuid"],
+        distinct=True,
+        where=[
+            QueryConstraint("observation_uuid", in_=observation_uuids),
+            QueryConstraint("link_name", equals="bounding box"),
+        ],
+    )
+    header, rows = parse_tsv(query(query_request))
+
+    observation_uuid_idx = header.index("observation_uuid")
+    association_uuid_idx = header.index("association_uuid")
+    association_uuids_by_observation_uuid = {}
+    for row in rows:
+        association_uuids_by_observation_uuid.setdefault(
+            row[observation_uuid_idx], set()
+        ).add(row[association_uuid_idx])
+
+    return association_uuids_by_observation_uuid
+
+
 def delete_observation(observation_uuid: str):
     """
     Delete an observation.
@@ -1,7 +1,7 @@
 from pydantic.dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class QueryConstraint:
     column: str
     between: list[str] | None = None
@@ -36,7 +36,7 @@ class QueryConstraint:
         return d
 
 
-@dataclass
+@dataclass(slots=True)
 class QueryRequest:
     select: list[str] | None = None
     distinct: bool | None = None
@@ -2,7 +2,8 @@
 App settings management.
 """
 
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
 
 from PyQt6 import QtCore
 
@@ -18,6 +19,11 @@ class SettingProxy(QtCore.QObject):
         self._type = type
         self._default = default
 
+        # Batching state: while held, valueChanged emission is deferred until release
+        self._hold_depth = 0
+        self._held_value = None
+        self._pending_change = False
+
         if default is not None and self.value is None:
             self.value = default
 
@@ -30,7 +36,31 @@ class SettingProxy(QtCore.QObject):
     @value.setter
     def value(self, value: Any):
         self._settings.setValue(self._key, value)
-        self.valueChanged.emit(value)
+        if self._hold_depth > 0:
+            self._pending_change = True
+        else:
+            self.valueChanged.emit(value)
+
+    def hold(self):
+        """
+        Defer valueChanged emission until the matching release().
+        """
+        if self._hold_depth == 0:
+            self._held_value = self.value
+        self._hold_depth += 1
+
+    def release(self):
+        """
+        Release a hold. If the value was changed while held, emit valueChanged once with the final value.
+        """
+        self._hold_depth -= 1
+        if self._hold_depth > 0 or not self._pending_change:
+            return
+
+        self._pending_change = False
+        value = self.value
+        if value != self._held_value:
+            self.valueChanged.emit(value)
 
 
 class SettingsManager:
@@ -48,6 +78,12 @@ class SettingsManager:
     >>> settings.some_int = ('mysection/mykey2', int, 42)
     >>> settings.some_int.value  # returns 42
     >>> settings.some_int.value = 24  # settings.some_int emits valueChanged with 24
+
+    Writes made inside a batch emit valueChanged at most once per setting, when the batch ends:
+    >>> with settings.batch():
+    ...     settings.some_int.value = 1
+    ...     settings.some_int.value = 2
+    >>> # settings.some_int emitted valueChanged once, with 2
     """
 
     _instance: "SettingsManager" = None
@@ -62,8 +98,22 @@ class SettingsManager:
         self._settings = settings or QtCore.QSettings()
         self._proxies: Dict[str, SettingProxy] = {}
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Context manager that coalesces setting writes. Each setting changed during the batch emits valueChanged once on exit.
+        """
+        proxies = list(self._proxies.values())
+        for proxy in proxies:
+            proxy.hold()
+        try:
+            yield
+        finally:
+            for proxy in proxies:
+                proxy.release()
+
     def __getattribute__(self, __name: str) -> Any:
-        if __name in ("_settings", "_proxies"):
+        if __name in ("_settings", "_proxies", "batch"):
             return super().__getattribute__(__name)
         elif __name in self._proxies:
             return self._proxies[__name]
@@ -3,11 +3,20 @@ Utilities.
 """
 
 
+import json
 import subprocess
 import sys
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Union
+
+from iso8601 import parse_date
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
 
 
 def get_timestamp(
@@ -51,6 +60,52 @@ def get_timestamp(
     return None
 
 
+@lru_cache(maxsize=65536)
+def parse_timestamp(timestamp: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp. Cached, since query results repeat the same timestamps (e.g. a video's start) across many rows.
+
+    Args:
+        timestamp: The timestamp string.
+
+    Returns:
+        The parsed timestamp.
+    """
+    return parse_date(timestamp)
+
+
+def dumps_json(obj: Any) -> str:
+    """
+    Serialize an object to a compact JSON string. Uses orjson if it is installed, else the standard library.
+
+    Both paths produce the same output for the plain dicts/lists/strings/numbers used here.
+
+    Args:
+        obj: The object to serialize.
+
+    Returns:
+        The JSON string.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    Parse a JSON string. Uses orjson if it is installed, else the standard library.
+
+    Args:
+        data: The JSON string or UTF-8 bytes.
+
+    Returns:
+        The parsed object.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def open_file_browser(path: Path):
     """
     Open a file browser to the given path. Implementation varies by platform.
@@ -7,7 +7,7 @@ Distributed under MIT license. See license.txt for more information.
 """
 
 import datetime
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 import cv2
 import numpy as np
@@ -21,6 +21,9 @@ from vars_gridview.lib.m3 import operations
 from vars_gridview.lib.settings import SettingsManager
 from vars_gridview.lib.util import get_timestamp
 
+# Sentinel for cached values that have not been computed yet, since None is a valid value
+_UNSET = object()
+
 
 class RectWidget(QtWidgets.QGraphicsWidget):
     rectHover = QtCore.pyqtSignal(object)
@@ -39,11 +42,14 @@ class RectWidget(QtWidgets.QGraphicsWidget):
         embedding_model: Optional[Embedding] = None,
         parent=None,
         text_label="rect widget",
+        image_loader: Optional[Callable[[], np.ndarray]] = None,
     ):
         QtWidgets.QGraphicsWidget.__init__(self, parent)
 
         self.localizations = localizations
-        self.image = image
+        self._image = image
+        self._image_shape = image.shape
+        self._image_loader = image_loader
         self.ancillary_data = ancillary_data
         self.video_data = video_data
         self.observer = observer
@@ -65,10 +71,14 @@ class RectWidget(QtWidgets.QGraphicsWidget):
         self._embedding_model = embedding_model
 
         self.roi = None
-        self.pic = None
+        self._pic = None
         self._embedding = None
         self.update_roi_pic()
 
+        # With a loader, keep only the ROI; the full image is reloaded when needed
+        if image_loader is not None:
+            self._image = None
+
         self._deleted = False  # Flag to indicate if this rect widget has been deleted. Used to prevent double deletion.
 
     @property
@@ -145,6 +155,17 @@ class RectWidget(QtWidgets.QGraphicsWidget):
             self.update_embedding()
         return self._embedding
 
+    @embedding.setter
+    def embedding(self, value: np.ndarray):
+        self._embedding = value
+
+    @property
+    def embedding_image(self) -> np.ndarray:
+        """
+        The image to embed: the ROI, flipped vertically.
+        """
+        return self.roi[::-1]
+
     def update_embedding(self):
         """
         Update the embedding value.
@@ -157,15 +178,37 @@ class RectWidget(QtWidgets.QGraphicsWidget):
                 "Embedding model is not provided; cannot compute embedding"
             )
 
-        self._embedding = self._embedding_model.embed(
-            self.localization.get_roi(self.image)[::-1]
-        )
+        self._embedding = self._embedding_model.embed(self.embedding_image)
+
+    @property
+    def pic(self) -> QtGui.QPixmap:
+        """
+        The scaled and padded pixmap of the ROI. Built on first access (i.e. first paint), so widgets that are never shown never pay for it.
+        """
+        self.build_pic()
+        return self._pic
+
+    def build_pic(self):
+        """
+        Build and cache the pixmap of the ROI, if it isn't already built.
+        """
+        if self._pic is None:
+            self._pic = self.getpic(self.roi)
+
+    def release_pic(self):
+        """
+        Drop the cached pixmap to free its memory. It's rebuilt from the ROI on next access.
+        """
+        self._pic = None
 
     def update_roi_pic(self):
-        self.roi = self.localization.get_roi(self.image)
-        self.pic = self.getpic(self.roi)
-        if self._embedding_model is not None:
-            self.update_embedding()
+        # Keep a compact tile; the sort methods scan it repeatedly
+        roi = self.localization.get_roi_contiguous(self.image)
+        if self._image_loader is not None and roi.base is not None:
+            roi = roi.copy()  # A view would keep the full image alive
+        self.roi = roi
+        self._pic = None  # Stale; rebuilt on next paint
+        self._embedding = None  # Stale; recomputed on next access
         self.update()
 
     def embedding_distance(self, other: "RectWidget") -> float:
@@ -191,15 +234,39 @@ class RectWidget(QtWidgets.QGraphicsWidget):
     def localization(self) -> VARSLocalization:
         return self.localizations[self.localization_index]
 
+    @property
+    def image(self) -> np.ndarray:
+        """
+        The full image. If the widget was given an image loader, the image isn't kept and is reloaded on each access.
+        """
+        if self._image is not None:
+            return self._image
+        return self._image_loader()
+
     @property
     def image_width(self):
-        return self.image.shape[1]
+        return self._image_shape[1]
 
     @property
     def image_height(self):
-        return self.image.shape[0]
+        return self._image_shape[0]
+
+    @property
+    def video_data(self) -> dict:
+        return self._video_data
+
+    @video_data.setter
+    def video_data(self, value: dict):
+        self._video_data = value
+        self._annotation_datetime = _UNSET  # Stale
 
     def annotation_datetime(self) -> Optional[datetime.datetime]:
+        # The timestamp is derived from the video data only, so compute it once. Sorting and the info panel call this repeatedly
+        if self._annotation_datetime is _UNSET:
+            self._annotation_datetime = self._compute_annotation_datetime()
+        return self._annotation_datetime
+
+    def _compute_annotation_datetime(self) -> Optional[datetime.datetime]:
         video_start_datetime = self.video_data["video_start_timestamp"]
 
         elapsed_time_millis = self.video_data.get("index_elapsed_time_millis", None)
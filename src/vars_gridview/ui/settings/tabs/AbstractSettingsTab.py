@@ -1,8 +1,8 @@
-from typing import Optional
+from typing import Any, Callable, List, Optional, Tuple
 
 from PyQt6 import QtCore, QtGui, QtWidgets
 
-from vars_gridview.lib.settings import SettingsManager
+from vars_gridview.lib.settings import SettingProxy, SettingsManager
 
 
 class AbstractSettingsTab(QtWidgets.QWidget):
@@ -14,6 +14,10 @@ class AbstractSettingsTab(QtWidgets.QWidget):
 
     settingsChanged = QtCore.pyqtSignal()
 
+    FORM_FIELD_GROWTH_POLICY = (
+        QtWidgets.QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow
+    )
+
     def __init__(self, name: str, icon: Optional[QtGui.QIcon] = None, parent=None):
         super().__init__(parent)
 
@@ -22,6 +26,11 @@ class AbstractSettingsTab(QtWidgets.QWidget):
         self._name = name
         self._icon = icon
 
+        # Setting -> widget setter bindings, only connected while the tab is visible
+        self._settings_bindings: List[Tuple[SettingProxy, Callable[[Any], None]]] = []
+        self._settings_snapshot: List[Any] = []
+        self._settings_bindings_connected = False
+
     @property
     def name(self):
         return self._name
@@ -33,5 +42,75 @@ class AbstractSettingsTab(QtWidgets.QWidget):
     def apply_settings(self):
         raise NotImplementedError()
 
+    @staticmethod
+    def _make_form_layout() -> QtWidgets.QFormLayout:
+        """
+        Create a form layout configured for settings tabs.
+
+        Returns:
+            The form layout.
+        """
+        layout = QtWidgets.QFormLayout()
+        layout.setFieldGrowthPolicy(AbstractSettingsTab.FORM_FIELD_GROWTH_POLICY)
+        return layout
+
     def _settings_changed(self):
         self.settingsChanged.emit()
+
+    def _track_changes(self, signal: QtCore.pyqtBoundSignal):
+        """
+        Forward a widget's change signal to settingsChanged.
+
+        The signal is connected signal-to-signal, so no Python slot runs per edit. Overloaded signals should be passed with their signature selected, e.g. `spinbox.valueChanged[int]`.
+
+        Args:
+            signal: The widget change signal.
+        """
+        signal.connect(self.settingsChanged)
+
+    def _bind_setting(self, setting: SettingProxy, setter: Callable[[Any], None]):
+        """
+        Bind a setting to a widget setter. The setter is called when the setting changes while the tab is visible.
+
+        Args:
+            setting: The setting proxy.
+            setter: The widget setter, called with the new setting value.
+        """
+        self._settings_bindings.append((setting, setter))
+        self._settings_snapshot.append(setting.value)
+
+    def _connect_settings_bindings(self):
+        """
+        Connect the setting bindings, first syncing any widgets whose setting changed while the tab was hidden.
+        """
+        if self._settings_bindings_connected:
+            return
+
+        for idx, (setting, setter) in enumerate(self._settings_bindings):
+            value = setting.value
+            if value != self._settings_snapshot[idx]:
+                setter(value)
+            setting.valueChanged.connect(setter)
+
+        self._settings_bindings_connected = True
+
+    def _disconnect_settings_bindings(self):
+        """
+        Disconnect the setting bindings, recording the setting values at the time of disconnection.
+        """
+        if not self._settings_bindings_connected:
+            return
+
+        for idx, (setting, setter) in enumerate(self._settings_bindings):
+            setting.valueChanged.disconnect(setter)
+            self._settings_snapshot[idx] = setting.value
+
+        self._settings_bindings_connected = False
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        self._connect_settings_bindings()
+        super().showEvent(event)
+
+    def hideEvent(self, event: QtGui.QHideEvent):
+        self._disconnect_settings_bindings()
+        super().hideEvent(event)
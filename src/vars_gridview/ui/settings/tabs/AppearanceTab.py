@@ -15,17 +15,18 @@ class AppearanceTab(AbstractSettingsTab):
         self.label_font_size_spinbox.setMinimum(4)
         self.label_font_size_spinbox.setMaximum(12)
         self.label_font_size_spinbox.setValue(self._settings.label_font_size.value)
-        self.label_font_size_spinbox.valueChanged.connect(self.settingsChanged.emit)
-        self._settings.label_font_size.valueChanged.connect(
-            self.label_font_size_spinbox.setValue
+        self._track_changes(self.label_font_size_spinbox.valueChanged[int])
+        self._bind_setting(
+            self._settings.label_font_size, self.label_font_size_spinbox.setValue
         )
 
         self.selection_highlight_color_button = QtWidgets.QPushButton()
         self.selection_highlight_color_button.clicked.connect(self.select_color)
         self._selection_highlight_color = self._settings.selection_highlight_color.value
         self._update_selection_highlight_color_button()
-        self._settings.selection_highlight_color.valueChanged.connect(
-            self._update_selection_highlight_color_button
+        self._bind_setting(
+            self._settings.selection_highlight_color,
+            self._set_selection_highlight_color,
         )
 
         self.label_font_size_spinbox.setSizePolicy(
@@ -45,16 +46,17 @@ class AppearanceTab(AbstractSettingsTab):
                 self._selection_highlight_color
             )
 
+    def _set_selection_highlight_color(self, color: str):
+        self._selection_highlight_color = color
+        self._update_selection_highlight_color_button()
+
     def _update_selection_highlight_color_button(self):
         self.selection_highlight_color_button.setStyleSheet(
             f"background-color: {self._selection_highlight_color};"
         )
 
     def arrange(self):
-        layout = QtWidgets.QFormLayout()
-        layout.setFieldGrowthPolicy(
-            QtWidgets.QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow
-        )
+        layout = self._make_form_layout()
 
         layout.addRow("Label font size", self.label_font_size_spinbox)
         layout.addRow(
@@ -64,5 +66,8 @@ class AppearanceTab(AbstractSettingsTab):
         self.setLayout(layout)
 
     def apply_settings(self):
-        self._settings.label_font_size.value = self.label_font_size_spinbox.value()
-        self._settings.selection_highlight_color.value = self._selection_highlight_color
+        with self._settings.batch():
+            self._settings.label_font_size.value = self.label_font_size_spinbox.value()
+            self._settings.selection_highlight_color.value = (
+                self._selection_highlight_color
+            )
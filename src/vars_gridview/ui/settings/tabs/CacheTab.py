@@ -18,17 +18,17 @@ class CacheTab(AbstractSettingsTab):
 
         self.cache_dir_lineedit = DirectorySelectionLineEdit(parent=self)
         self.cache_dir_lineedit.setText(self._settings.cache_dir.value)
-        self.cache_dir_lineedit.textChanged.connect(self.settingsChanged.emit)
-        self._settings.cache_dir.valueChanged.connect(self.cache_dir_lineedit.setText)
+        self._track_changes(self.cache_dir_lineedit.textChanged)
+        self._bind_setting(self._settings.cache_dir, self.cache_dir_lineedit.setText)
 
         self.cache_size_spinbox = QtWidgets.QSpinBox()
         self.cache_size_spinbox.setMinimum(1)
         self.cache_size_spinbox.setMaximum(1000000)
         self.cache_size_spinbox.setSuffix(" MB")
         self.cache_size_spinbox.setValue(self._settings.cache_size_mb.value)
-        self.cache_size_spinbox.valueChanged.connect(self.settingsChanged.emit)
-        self._settings.cache_size_mb.valueChanged.connect(
-            self.cache_size_spinbox.setValue
+        self._track_changes(self.cache_size_spinbox.valueChanged[int])
+        self._bind_setting(
+            self._settings.cache_size_mb, self.cache_size_spinbox.setValue
         )
 
         self.cache_dir_lineedit.setSizePolicy(
@@ -49,10 +49,7 @@ class CacheTab(AbstractSettingsTab):
     def arrange(self):
         root_layout = QtWidgets.QVBoxLayout()
 
-        form_layout = QtWidgets.QFormLayout()
-        form_layout.setFieldGrowthPolicy(
-            QtWidgets.QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow
-        )
+        form_layout = self._make_form_layout()
 
         form_layout.addRow("Cache directory", self.cache_dir_lineedit)
         form_layout.addRow("Cache size", self.cache_size_spinbox)
@@ -63,5 +60,6 @@ class CacheTab(AbstractSettingsTab):
         self.setLayout(root_layout)
 
     def apply_settings(self):
-        self._settings.cache_dir.value = self.cache_dir_lineedit.text()
-        self._settings.cache_size_mb.value = self.cache_size_spinbox.value()
+        with self._settings.batch():
+            self._settings.cache_dir.value = self.cache_dir_lineedit.text()
+            self._settings.cache_size_mb.value = self.cache_size_spinbox.value()
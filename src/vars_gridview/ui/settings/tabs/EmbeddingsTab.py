@@ -15,24 +15,23 @@ class EmbeddingsTab(AbstractSettingsTab):
         self._embeddings_enabled_toggle.setChecked(
             self._settings.embeddings_enabled.value
         )
-        self._embeddings_enabled_toggle.stateChanged.connect(self.settingsChanged.emit)
-        self._settings.embeddings_enabled.valueChanged.connect(
-            self._embeddings_enabled_toggle.setChecked
+        self._track_changes(self._embeddings_enabled_toggle.stateChanged[int])
+        self._bind_setting(
+            self._settings.embeddings_enabled,
+            self._embeddings_enabled_toggle.setChecked,
         )
 
         self.arrange()
 
     def arrange(self):
-        layout = QtWidgets.QFormLayout()
-        layout.setFieldGrowthPolicy(
-            QtWidgets.QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow
-        )
+        layout = self._make_form_layout()
 
         layout.addRow("Embeddings enabled", self._embeddings_enabled_toggle)
 
         self.setLayout(layout)
 
     def apply_settings(self):
-        self._settings.embeddings_enabled.value = (
-            self._embeddings_enabled_toggle.isChecked()
-        )
+        with self._settings.batch():
+            self._settings.embeddings_enabled.value = (
+                self._embeddings_enabled_toggle.isChecked()
+            )
@@ -12,8 +12,8 @@ class M3Tab(AbstractSettingsTab):
         super().__init__("M3", parent=parent)
 
         self.raziel_url_edit = QtWidgets.QLineEdit(self._settings.raz_url.value)
-        self.raziel_url_edit.textChanged.connect(self.settingsChanged.emit)
-        self._settings.raz_url.valueChanged.connect(self.raziel_url_edit.setText)
+        self._track_changes(self.raziel_url_edit.textChanged)
+        self._bind_setting(self._settings.raz_url, self.raziel_url_edit.setText)
 
         self.raziel_url_edit.setSizePolicy(
             QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed
@@ -22,14 +22,12 @@ class M3Tab(AbstractSettingsTab):
         self.arrange()
 
     def arrange(self):
-        layout = QtWidgets.QFormLayout()
-        layout.setFieldGrowthPolicy(
-            QtWidgets.QFormLayout.FieldGrowthPolicy.ExpandingFieldsGrow
-        )
+        layout = self._make_form_layout()
 
         layout.addRow("Raziel URL", self.raziel_url_edit)
 
         self.setLayout(layout)
 
     def apply_settings(self):
-        self._settings.raz_url.value = self.raziel_url_edit.text()
+        with self._settings.batch():
+            self._settings.raz_url.value = self.raziel_url_edit.text()
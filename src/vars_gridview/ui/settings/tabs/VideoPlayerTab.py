@@ -15,18 +15,17 @@ class VideoPlayerTab(AbstractSettingsTab):
         self.sharktopoda_autoconnect_checkbox.setChecked(
             self._settings.sharktopoda_autoconnect.value
         )
-        self.sharktopoda_autoconnect_checkbox.stateChanged.connect(
-            self.settingsChanged.emit
-        )
-        self._settings.sharktopoda_autoconnect.valueChanged.connect(
-            self.sharktopoda_autoconnect_checkbox.setChecked
+        self._track_changes(self.sharktopoda_autoconnect_checkbox.stateChanged[int])
+        self._bind_setting(
+            self._settings.sharktopoda_autoconnect,
+            self.sharktopoda_autoconnect_checkbox.setChecked,
         )
 
         self.sharktopoda_host_edit = QtWidgets.QLineEdit()
         self.sharktopoda_host_edit.setText(self._settings.sharktopoda_host.value)
-        self.sharktopoda_host_edit.textChanged.connect(self.settingsChanged.emit)
-        self._settings.sharktopoda_host.valueChanged.connect(
-            self.sharktopoda_host_edit.setText
+        self._track_changes(self.sharktopoda_host_edit.textChanged)
+        self._bind_setting(
+            self._settings.sharktopoda_host, self.sharktopoda_host_edit.setText
         )
 
         self.sharktopoda_outgoing_port_edit = QtWidgets.QSpinBox()
@@ -35,11 +34,10 @@ class VideoPlayerTab(AbstractSettingsTab):
         self.sharktopoda_outgoing_port_edit.setValue(
             self._settings.sharktopoda_outgoing_port.value
         )
-        self.sharktopoda_outgoing_port_edit.valueChanged.connect(
-            self.settingsChanged.emit
-        )
-        self._settings.sharktopoda_outgoing_port.valueChanged.connect(
-            self.sharktopoda_outgoing_port_edit.setValue
+        self._track_changes(self.sharktopoda_outgoing_port_edit.valueChanged[int])
+        self._bind_setting(
+            self._settings.sharktopoda_outgoing_port,
+            self.sharktopoda_outgoing_port_edit.setValue,
         )
 
         self.sharktopoda_incoming_port_edit = QtWidgets.QSpinBox()
@@ -48,11 +46,10 @@ class VideoPlayerTab(AbstractSettingsTab):
         self.sharktopoda_incoming_port_edit.setValue(
             self._settings.sharktopoda_incoming_port.value
         )
-        self.sharktopoda_incoming_port_edit.valueChanged.connect(
-            self.settingsChanged.emit
-        )
-        self._settings.sharktopoda_incoming_port.valueChanged.connect(
-            self.sharktopoda_incoming_port_edit.setValue
+        self._track_changes(self.sharktopoda_incoming_port_edit.valueChanged[int])
+        self._bind_setting(
+            self._settings.sharktopoda_incoming_port,
+            self.sharktopoda_incoming_port_edit.setValue,
         )
 
         self.sharktopoda_host_edit.setSizePolicy(
@@ -105,13 +102,14 @@ class VideoPlayerTab(AbstractSettingsTab):
         self.setLayout(layout)
 
     def apply_settings(self):
-        self._settings.sharktopoda_host.value = self.sharktopoda_host_edit.text()
-        self._settings.sharktopoda_outgoing_port.value = (
-            self.sharktopoda_outgoing_port_edit.value()
-        )
-        self._settings.sharktopoda_incoming_port.value = (
-            self.sharktopoda_incoming_port_edit.value()
-        )
-        self._settings.sharktopoda_autoconnect.value = (
-            self.sharktopoda_autoconnect_checkbox.isChecked()
-        )
+        with self._settings.batch():
+            self._settings.sharktopoda_host.value = self.sharktopoda_host_edit.text()
+            self._settings.sharktopoda_outgoing_port.value = (
+                self.sharktopoda_outgoing_port_edit.value()
+            )
+            self._settings.sharktopoda_incoming_port.value = (
+                self.sharktopoda_incoming_port_edit.value()
+            )
+            self._settings.sharktopoda_autoconnect.value = (
+                self.sharktopoda_autoconnect_checkbox.isChecked()
+            )